@@ -48,6 +48,8 @@ if __name__ == "__main__":
     load_dotenv()
     
     print("🚨 WARNING: This will delete ALL data in your bot's database!")
+    # The bot caches which users have rows, so it must not be running during a reset
+    print("⚠️  Stop the bot before resetting and start it again afterwards.")
     response = input("Are you sure you want to continue? (yes/no): ")
     
     if response.lower() in ['yes', 'y']:
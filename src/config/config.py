@@ -20,6 +20,8 @@ def get_env(name: str, default=None):
 
 # general settings
 WORKERS: int = get_env("WORKERS", 100)
+# At least one download worker; a non-numeric value fails at startup
+MAX_CONCURRENT_DOWNLOADS: int = max(1, int(get_env("MAX_CONCURRENT_DOWNLOADS", 4)))
 APP_ID: int = get_env("APP_ID")
 APP_HASH = get_env("APP_HASH")
 BOT_TOKEN = get_env("BOT_TOKEN")
@@ -41,6 +43,10 @@ RCLONE_PATH = get_env("RCLONE")
 # access control settings
 ACCESS_CONTROL_ENABLED = get_env("ACCESS_CONTROL_ENABLED", True)  # enable access control
 
+# logging settings - bot.log is rotated once it reaches LOG_MAX_BYTES
+LOG_MAX_BYTES: int = get_env("LOG_MAX_BYTES", 50 * 1024 * 1024)
+LOG_BACKUPS: int = get_env("LOG_BACKUPS", 5)
+
 # For advance users
 # Please do not change, if you don't know what these are.
 TG_NORMAL_MAX_SIZE = 2000 * 1024 * 1024
@@ -4,6 +4,7 @@
 import logging
 import math
 import os
+import time
 from contextlib import contextmanager
 from typing import Literal, List
 from datetime import datetime
@@ -107,21 +108,36 @@ def session_manager():
         s.close()
 
 
-def get_quality_settings(tgid) -> Literal["high", "medium", "low", "audio", "custom"]:
+# (quality, format) per user, kept briefly and dropped on every settings write
+USER_SETTINGS_TTL = 60
+_user_settings_cache = {}
+
+
+def get_user_settings(tgid) -> tuple:
+    """Get the (quality, format) settings of a user with a single query"""
+    cached = _user_settings_cache.get(tgid)
+    if cached and time.monotonic() - cached[0] < USER_SETTINGS_TTL:
+        return cached[1]
+
     with session_manager() as session:
-        user = session.query(User).filter(User.user_id == tgid).first()
-        if user and user.settings:
-            return user.settings.quality
+        setting = (
+            session.query(Setting.quality, Setting.format)
+            .join(User, Setting.user_id == User.id)
+            .filter(User.user_id == tgid)
+            .first()
+        )
+        settings = (setting.quality, setting.format) if setting else ("high", "video")
+
+    _user_settings_cache[tgid] = (time.monotonic(), settings)
+    return settings
 
-        return "high"
+
+def get_quality_settings(tgid) -> Literal["high", "medium", "low", "audio", "custom"]:
+    return get_user_settings(tgid)[0]
 
 
 def get_format_settings(tgid) -> Literal["video", "audio", "document"]:
-    with session_manager() as session:
-        user = session.query(User).filter(User.user_id == tgid).first()
-        if user and user.settings:
-            return user.settings.format
-        return "video"
+    return get_user_settings(tgid)[1]
 
 
 def set_user_settings(tgid: int, key: str, value: str):
@@ -155,14 +171,25 @@ def set_user_settings(tgid: int, key: str, value: str):
         else:
             session.add(Setting(user_id=user.id, **{key: value}))
     
+    _user_settings_cache.pop(tgid, None)
     return True
 
 
+# Users known to have a row, so once seen we can skip the lookup. Assumes user
+# rows are not deleted while the bot is running: the bot itself never deletes
+# them, and reset_database.py drops tables from a separate process, which must
+# be run with the bot stopped so this set starts empty again
+initialized_users = set()
+
+
 def init_user(uid: int):
+    if uid in initialized_users:
+        return
     with session_manager() as session:
         user = session.query(User).filter(User.user_id == uid).first()
         if not user:
             session.add(User(user_id=uid))
+    initialized_users.add(uid)
 
 
 def get_user_access_status(uid: int) -> int:
@@ -185,6 +212,24 @@ def set_user_access_status(uid: int, status: int):
 
 
 # Channel Management Functions
+
+# Active required channels, read on every access check but changed only by admins;
+# every channel write below drops the cached copy
+REQUIRED_CHANNELS_TTL = 60
+_required_channels_cache = {"t": 0.0, "data": None, "version": 0}
+
+
+def invalidate_required_channels():
+    """Forget the cached required channel list"""
+    _required_channels_cache["data"] = None
+    _required_channels_cache["version"] += 1
+
+
+def get_required_channels_version() -> int:
+    """Counter bumped whenever the required channels change, for caches built from them"""
+    return _required_channels_cache["version"]
+
+
 def add_required_channel(channel_id: int, channel_name: str = None, added_by: int = None) -> bool:
     """Add a channel to the required channels list"""
     with session_manager() as session:
@@ -192,7 +237,6 @@ def add_required_channel(channel_id: int, channel_name: str = None, added_by: in
         if existing:
             existing.is_active = True
             existing.channel_name = channel_name or existing.channel_name
-            return True
         else:
             session.add(Channel(
                 channel_id=channel_id,
@@ -200,17 +244,19 @@ def add_required_channel(channel_id: int, channel_name: str = None, added_by: in
                 added_by=added_by or 0,
                 is_active=True
             ))
-            return True
+    invalidate_required_channels()
+    return True
 
 
 def remove_required_channel(channel_id: int) -> bool:
     """Remove a channel from the required channels list"""
     with session_manager() as session:
         channel = session.query(Channel).filter(Channel.channel_id == channel_id).first()
-        if channel:
-            channel.is_active = False
-            return True
-        return False
+        if not channel:
+            return False
+        channel.is_active = False
+    invalidate_required_channels()
+    return True
 
 
 def add_channel(channel_id: int, channel_name: str = None, channel_link: str = None, added_by: int = None) -> bool:
@@ -228,24 +274,30 @@ def add_channel(channel_id: int, channel_name: str = None, channel_link: str = N
             added_by=added_by
         )
         session.add(channel)
-        return True
+    invalidate_required_channels()
+    return True
 
 
 def remove_channel(channel_db_id: int) -> bool:
     """Remove a required channel by database ID"""
     with session_manager() as session:
         channel = session.query(Channel).filter(Channel.id == channel_db_id).first()
-        if channel:
-            session.delete(channel)
-            return True
-        return False
+        if not channel:
+            return False
+        session.delete(channel)
+    invalidate_required_channels()
+    return True
 
 
 def get_required_channels() -> List[dict]:
-    """Get all required channels"""
+    """Get all required channels, cached for REQUIRED_CHANNELS_TTL seconds"""
+    cached = _required_channels_cache["data"]
+    if cached is not None and time.monotonic() - _required_channels_cache["t"] < REQUIRED_CHANNELS_TTL:
+        return cached
+
     with session_manager() as session:
         channels = session.query(Channel).filter(Channel.is_active == True).all()
-        return [
+        required = [
             {
                 'id': ch.id,
                 'channel_id': ch.channel_id,
@@ -257,6 +309,10 @@ def get_required_channels() -> List[dict]:
             for ch in channels
         ]
 
+    _required_channels_cache["data"] = required
+    _required_channels_cache["t"] = time.monotonic()
+    return required
+
 
 def get_channel_by_id(channel_id: int) -> dict:
     """Get channel information by channel ID"""
@@ -301,92 +357,7 @@ def check_user_access(uid: int, admins: List[int] = None) -> dict:
     return {'has_access': False, 'reason': 'needs_channel_check', 'user_status': user_status}
 
 
-async def check_channel_membership(client, uid: int) -> dict:
-    """
-    Check if user is member of ANY required channel (not ALL)
-    Returns: {
-        'is_member': bool,
-        'channels_checked': int,
-        'member_of': List[str],  # channel names user is member of
-        'required_channels': List[dict]
-    }
-    """
-    try:
-        required_channels = get_required_channels()
-        if not required_channels:
-            # No required channels = everyone has access
-            return {
-                'is_member': True,
-                'channels_checked': 0,
-                'member_of': [],
-                'required_channels': []
-            }
-        
-        member_of = []
-        
-        for channel in required_channels:
-            try:
-                # Try to get user's membership status
-                member = await client.get_chat_member(channel['channel_id'], uid)
-                if member.status in ['creator', 'administrator', 'member']:
-                    member_of.append(channel['channel_name'] or str(channel['channel_id']))
-                    # User is member of at least one channel - grant access
-                    return {
-                        'is_member': True,
-                        'channels_checked': len(required_channels),
-                        'member_of': member_of,
-                        'required_channels': required_channels
-                    }
-            except Exception as e:
-                # User is not a member or channel is inaccessible
-                logging.debug(f"User {uid} not member of channel {channel['channel_id']}: {e}")
-                continue
-        
-        # User is not member of any required channel
-        return {
-            'is_member': False,
-            'channels_checked': len(required_channels),
-            'member_of': member_of,
-            'required_channels': required_channels
-        }
-        
-    except Exception as e:
-        logging.error(f"Error checking channel membership for user {uid}: {e}")
-        return {
-            'is_member': False,
-            'channels_checked': 0,
-            'member_of': [],
-            'required_channels': []
-        }
-
-
-async def check_full_user_access(client, uid: int, admins: List[int] = None) -> dict:
-    """
-    Complete access check including channel membership
-    """
-    # First check user status and admin
-    basic_check = check_user_access(uid, admins)
-    
-    if basic_check['reason'] in ['admin', 'whitelisted', 'banned']:
-        return basic_check
-    
-    # Need to check channel membership
-    channel_check = await check_channel_membership(client, uid)
-    
-    if channel_check['is_member']:
-        return {
-            'has_access': True,
-            'reason': 'channel_member',
-            'user_status': basic_check['user_status'],
-            'channel_info': channel_check
-        }
-    else:
-        return {
-            'has_access': False,
-            'reason': 'no_channel_membership',
-            'user_status': basic_check['user_status'],
-            'channel_info': channel_check
-        }
+_ACCESS_STATUS_TEXT = {-1: 'Banned', 0: 'Normal', 1: 'Whitelisted'}
 
 
 def get_user_info(uid: int) -> dict:
@@ -397,11 +368,7 @@ def get_user_info(uid: int) -> dict:
             return {
                 'user_id': user.user_id,
                 'access_status': user.access_status,
-                'access_status_text': {
-                    -1: 'Banned',
-                    0: 'Normal',
-                    1: 'Whitelisted'
-                }.get(user.access_status, 'Unknown'),
+                'access_status_text': _ACCESS_STATUS_TEXT.get(user.access_status, 'Unknown'),
                 'has_settings': user.settings is not None,
                 'config': user.config
             }
@@ -416,7 +383,7 @@ def get_user_platform_quality(uid: int, platform: str = 'youtube') -> str:
 
 def set_user_platform_quality(uid: int, quality: str, platform: str = 'youtube') -> bool:
     """Set user's quality preference for specific platform"""
-    return set_user_settings(uid, quality=quality)
+    return set_user_settings(uid, "quality", quality)
 
 
 def create_youtube_format_session(uid: int, url: str, formats: dict, download_id: int = None) -> bool:
@@ -770,40 +737,55 @@ def get_top_users(limit: int = 10) -> list:
         return []
 
 
-def search_users(search_term: str = None, status_filter: int = None, limit: int = 50) -> list:
-    """Search users by ID or status"""
+def _user_row(user: User, download_count: int) -> dict:
+    """Shape a user for the admin search and lookup views"""
+    return {
+        'user_id': user.user_id,
+        'access_status': user.access_status,
+        'access_status_text': _ACCESS_STATUS_TEXT.get(user.access_status, 'Unknown'),
+        'download_count': download_count,
+        'has_settings': user.settings is not None
+    }
+
+
+def iter_search_users(search_term: str = None, status_filter: int = None, batch_size: int = 100):
+    """Search users by ID or status, yielding rows as they are fetched
+    
+    The database session stays open until the iterator is exhausted or closed,
+    so callers that stop early should close it (e.g. with contextlib.closing).
+    """
+    with session_manager() as session:
+        # Download counts for every user in one grouped subquery, not a COUNT per row
+        counts = session.query(
+            DownloadStats.user_id,
+            func.count(DownloadStats.id).label('download_count')
+        ).group_by(DownloadStats.user_id).subquery()
+        query = session.query(User, func.coalesce(counts.c.download_count, 0)).outerjoin(
+            counts, counts.c.user_id == User.user_id
+        )
+        
+        # Filter by status if provided
+        if status_filter is not None:
+            query = query.filter(User.access_status == status_filter)
+        
+        # Filter by user ID if search term is numeric
+        if search_term and search_term.isdigit():
+            query = query.filter(User.user_id == int(search_term))
+        
+        for user, download_count in query.yield_per(batch_size):
+            yield _user_row(user, download_count)
+
+
+def get_user_by_id(uid: int) -> dict:
+    """Get a single user row in the same shape as iter_search_users rows"""
     try:
         with session_manager() as session:
-            query = session.query(User)
-            
-            # Filter by status if provided
-            if status_filter is not None:
-                query = query.filter(User.access_status == status_filter)
-            
-            # Filter by user ID if search term is numeric
-            if search_term and search_term.isdigit():
-                query = query.filter(User.user_id == int(search_term))
-            
-            users = query.limit(limit).all()
+            user = session.query(User).filter(User.user_id == uid).first()
+            if not user:
+                return None
             
-            result = []
-            for user in users:
-                # Get download count for each user
-                download_count = session.query(DownloadStats).filter(DownloadStats.user_id == user.user_id).count()
-                
-                result.append({
-                    'user_id': user.user_id,
-                    'access_status': user.access_status,
-                    'access_status_text': {
-                        -1: 'Banned',
-                        0: 'Normal',
-                        1: 'Whitelisted'
-                    }.get(user.access_status, 'Unknown'),
-                    'download_count': download_count,
-                    'has_settings': user.settings is not None
-                })
-            
-            return result
+            download_count = session.query(DownloadStats).filter(DownloadStats.user_id == uid).count()
+            return _user_row(user, download_count)
     except Exception as e:
-        logging.error(f"Failed to search users: {e}")
-        return []
+        logging.error(f"Failed to get user {uid}: {e}")
+        return None
@@ -3,6 +3,7 @@
 
 # ytdlbot - types.py
 
+import asyncio
 import hashlib
 import json
 import logging
@@ -24,8 +25,7 @@ from tqdm import tqdm
 from config import TG_NORMAL_MAX_SIZE, Types
 from database import Redis
 from database.model import (
-    get_format_settings,
-    get_quality_settings,
+    get_user_settings,
     log_download_completion,
 )
 from engine.helper import debounce, sizeof_fmt
@@ -64,8 +64,12 @@ class BaseDownloader(ABC):
         self._tempdir = tempfile.TemporaryDirectory(prefix="ytdl-")
         self._bot_msg: Types.Message = bot_msg
         self._redis = Redis()
-        self._quality = get_quality_settings(self._chat_id)
-        self._format = get_format_settings(self._chat_id)
+        self._quality, self._format = get_user_settings(self._chat_id)
+        # Progress hooks may fire from a download worker thread, keep the loop to edit messages on
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
 
     def __del__(self):
         self._tempdir.cleanup()
@@ -132,8 +136,12 @@ class BaseDownloader(ABC):
 
     @debounce(5)
     def edit_text(self, text: str):
-        import asyncio
         try:
+            if self._loop is not None and self._loop.is_running():
+                # Safe from both the loop thread and download worker threads
+                asyncio.run_coroutine_threadsafe(self._bot_msg.edit_text(text), self._loop)
+                return
+
             loop = asyncio.get_event_loop()
             if loop.is_running():
                 # Schedule coroutine to run in the background
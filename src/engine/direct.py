@@ -3,6 +3,7 @@
 
 # ytdlbot - direct.py
 
+import asyncio
 import logging
 import os
 import re
@@ -206,7 +207,8 @@ class DirectDownload(BaseDownloader):
         return self._requests_download()
 
     async def _start(self):
-        downloaded_files = self._download()
+        # aria2/requests block until the file is on disk, keep them off the event loop
+        downloaded_files = await asyncio.to_thread(self._download)
         if downloaded_files:
             # Auto-detect file type and override format setting for proper handling
             self._auto_detect_format(downloaded_files[0])
@@ -3,6 +3,7 @@
 
 # ytdlbot - generic.py
 
+import asyncio
 import logging
 import os
 import time
@@ -12,7 +13,7 @@ import yt_dlp
 
 from config import AUDIO_FORMAT
 from utils import is_youtube
-from database.model import get_format_settings, get_quality_settings, log_download_completion
+from database.model import log_download_completion
 from engine.base import BaseDownloader
 
 
@@ -34,7 +35,7 @@ class YoutubeDownload(BaseDownloader):
         if not is_youtube(self._url):
             return [None]
 
-        quality, format_ = get_quality_settings(self._chat_id), get_format_settings(self._chat_id)
+        quality, format_ = self._quality, self._format
         # quality: high, medium, low, custom
         # format: audio, video, document
         formats = []
@@ -154,7 +155,8 @@ class YoutubeDownload(BaseDownloader):
             default_formats = formats + self._setup_formats()
         
         try:
-            files = self._download(default_formats)
+            # yt-dlp blocks for the whole download, keep it off the event loop
+            files = await asyncio.to_thread(self._download, default_formats)
             
             # Check if download was successful
             if not files:
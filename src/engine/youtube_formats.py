@@ -4,12 +4,28 @@
 # ytdlbot - youtube_formats.py
 # YouTube format extraction and URL validation functions
 
+import functools
 import logging
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlparse
+
 import yt_dlp
-from urllib.parse import urlparse
+
 from utils import is_youtube
 
+FORMATS_CACHE_TTL = 600
+FORMATS_CACHE_MAX = 1024
+_formats_cache = OrderedDict()
+# extract_youtube_formats runs in to_thread workers, so guard the LRU updates
+_formats_cache_lock = threading.Lock()
+
+# Query parameters that only track where a link was shared from
+_TRACKING_PARAMS = frozenset({"feature", "si", "pp", "ab_channel", "app"})
 
+
+@functools.lru_cache(maxsize=4096)
 def is_youtube_url(url: str) -> bool:
     """
     Check if a URL is a YouTube URL.
@@ -23,10 +39,48 @@ def is_youtube_url(url: str) -> bool:
     return is_youtube(url)
 
 
+def canonical_youtube_url(url: str) -> str:
+    """
+    Normalize a YouTube URL so equivalent links map to the same string.
+    
+    youtu.be/<id> and /shorts/<id> become youtube.com/watch?v=<id>, and
+    tracking parameters (utm_*, feature, si, ...) are dropped.
+    
+    Args:
+        url (str): YouTube URL
+        
+    Returns:
+        str: Canonical form of the URL
+    """
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    path = parsed.path.rstrip("/")
+    query = [
+        (key, value) for key, value in parse_qsl(parsed.query)
+        if key not in _TRACKING_PARAMS and not key.startswith("utm_")
+    ]
+
+    video_id = None
+    if host == "youtu.be":
+        video_id = path.lstrip("/")
+    elif path.startswith("/shorts/"):
+        video_id = path[len("/shorts/"):]
+    if video_id:
+        query.insert(0, ("v", video_id))
+        path = "/watch"
+
+    query.sort(key=lambda item: item[0] != "v")
+    return f"https://www.youtube.com{path}?{urlencode(query)}" if query else f"https://www.youtube.com{path}"
+
+
 def extract_youtube_formats(url: str) -> dict:
     """
     Extract available video and audio formats from a YouTube URL.
     
+    Successful results are cached for FORMATS_CACHE_TTL seconds, keyed by
+    the canonical URL, so resending the same video skips the yt-dlp probe.
+    The cached dict is shared between callers and must be treated as read-only.
+    
     Args:
         url (str): YouTube URL
         
@@ -35,7 +89,27 @@ def extract_youtube_formats(url: str) -> dict:
     """
     if not is_youtube_url(url):
         return {'video_formats': [], 'audio_formats': []}
-    
+
+    key = canonical_youtube_url(url)
+    with _formats_cache_lock:
+        cached = _formats_cache.get(key)
+        if cached and time.monotonic() - cached[0] < FORMATS_CACHE_TTL:
+            _formats_cache.move_to_end(key)
+            return cached[1]
+
+    # Probe outside the lock so other URLs aren't held up behind yt-dlp
+    formats = _extract_youtube_formats(url)
+    if formats['video_formats'] or formats['audio_formats']:
+        with _formats_cache_lock:
+            _formats_cache[key] = (time.monotonic(), formats)
+            _formats_cache.move_to_end(key)
+            if len(_formats_cache) > FORMATS_CACHE_MAX:
+                _formats_cache.popitem(last=False)
+    return formats
+
+
+def _extract_youtube_formats(url: str) -> dict:
+    """Run the yt-dlp probe behind extract_youtube_formats"""
     try:
         # Configure yt-dlp options for format extraction
         ydl_opts = {
@@ -134,36 +208,65 @@ def get_format_display_name(format_info: dict) -> str:
     Args:
         format_info (dict): Format information dictionary
         
+    Returns:
+        str: Display name for the format
+    """
+    return format_display_name(
+        format_info.get('height'),
+        format_info.get('format_note'),
+        format_info.get('vcodec'),
+        format_info.get('acodec'),
+        format_info.get('ext'),
+        format_info.get('filesize') or format_info.get('filesize_approx'),
+        format_info.get('type', '')
+    )
+
+
+@functools.lru_cache(maxsize=2048)
+def format_display_name(height, format_note, vcodec, acodec, ext, filesize, format_type) -> str:
+    """
+    Build the display name from hashable format fields.
+    
+    The same formats are rendered for every user looking at a video, so the
+    result is cached on the field values.
+    
+    Args:
+        height (int): Video height, if any
+        format_note (str): yt-dlp format note, used when there is no height
+        vcodec (str): Video codec
+        acodec (str): Audio codec
+        ext (str): File extension
+        filesize (int): Exact or approximate file size in bytes
+        format_type (str): One of 'video+audio', 'video-only', 'audio-only'
+        
     Returns:
         str: Display name for the format
     """
     parts = []
     
     # Add quality info
-    if format_info.get('height'):
-        parts.append(f"{format_info['height']}p")
-    elif format_info.get('format_note'):
-        parts.append(format_info['format_note'])
+    if height:
+        parts.append(f"{height}p")
+    elif format_note:
+        parts.append(format_note)
     
     # Add codec info
-    if format_info.get('vcodec') and format_info['vcodec'] != 'none':
-        parts.append(format_info['vcodec'])
+    if vcodec and vcodec != 'none':
+        parts.append(vcodec)
     
-    if format_info.get('acodec') and format_info['acodec'] != 'none':
-        parts.append(format_info['acodec'])
+    if acodec and acodec != 'none':
+        parts.append(acodec)
     
     # Add extension
-    if format_info.get('ext'):
-        parts.append(format_info['ext'])
+    if ext:
+        parts.append(ext)
     
     # Add file size if available
-    filesize = format_info.get('filesize') or format_info.get('filesize_approx')
     if filesize:
         from utils import sizeof_fmt
         parts.append(sizeof_fmt(filesize))
     
     # Add type indicator
-    format_type = format_info.get('type', '')
     if format_type == 'video+audio':
         parts.append('📹🔊')
     elif format_type == 'video-only':
@@ -174,6 +277,23 @@ def get_format_display_name(format_info: dict) -> str:
     return ' | '.join(filter(None, parts))
 
 
+def get_format_display_name_short(format_info: dict, max_len: int = 27) -> str:
+    """
+    Generate a display name that fits into an inline button.
+    
+    Args:
+        format_info (dict): Format information dictionary
+        max_len (int): Maximum length of the returned name, including the ellipsis
+        
+    Returns:
+        str: Display name, truncated with "..." when longer than max_len
+    """
+    name = get_format_display_name(format_info)
+    if len(name) <= max_len:
+        return name
+    return f"{name:.{max_len - 3}}..."
+
+
 def get_best_format_ids(formats_dict: dict) -> dict:
     """
     Get the best format IDs for different quality levels.
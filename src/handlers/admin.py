@@ -3,7 +3,13 @@
 
 import re
 import asyncio
+import functools
 import logging
+import time
+from collections import OrderedDict
+from contextlib import closing
+from itertools import islice
+from types import MappingProxyType
 from typing import List, Dict
 
 from pyrogram import Client, filters
@@ -15,19 +21,72 @@ from database.model import (
     add_channel, remove_channel, get_required_channels, 
     set_user_access_status, get_user_access_status,
     session_manager, User, get_download_statistics,
-    get_user_download_stats, get_top_users, search_users,
-    get_user_info
+    get_user_download_stats, get_top_users, iter_search_users,
+    get_user_info, get_user_by_id
 )
-from utils.access_control import get_admin_list
+from utils.access_control import get_admin_set
+from utils.decorators import invalidate_access
 
 logger = logging.getLogger(__name__)
 
+# Admin ids are fixed by configuration, resolve them once at import
+_ADMIN_IDS = get_admin_set()
+
+# Bare Telegram username (without @), as typed when adding a channel
+_USERNAME_RE = re.compile(r'^[a-zA-Z][\w\d_]{4,31}$')
+
+# Access status labels, shared by the user management views
+_STATUS_TEXT = MappingProxyType({
+    -1: "❌ **Banned**",
+    0: "👤 **Normal** (subject to channel membership)",
+    1: "✅ **Whitelisted** (always has access)"
+})
+_STATUS_LABEL_BY_ACCESS = MappingProxyType({-1: "Banned", 0: "Normal", 1: "Whitelisted"})
+
+# Message templates for the user management views, filled with str.format_map
+_USER_DETAILS_TEMPLATE = (
+    "🔍 **User Information**\n\n"
+    "**User:** {mention}\n"
+    "**ID:** `{uid}`\n"
+    "**Username:** {username}\n"
+    "**Full Name:** {full_name}\n"
+    "**Status:** {status}\n\n"
+    "**📊 Download Statistics:**\n"
+    "• Total Downloads: {total_downloads}\n"
+    "• Successful: {successful_downloads}\n"
+    "• Success Rate: {success_rate}%\n"
+    "• Avg Time: {avg_download_time}s\n"
+)
+_CONFIRM_ACTION_TEMPLATE = (
+    "{emoji} **Confirm {title}**\n\n"
+    "**User:** {mention}\n"
+    "**ID:** `{uid}`\n"
+    "{profile}"
+    "**Current Status:** {status}\n\n"
+    "Are you sure you want to **{action}** this user?"
+    "\n\n{note}"
+)
+_CONFIRM_PROFILE_TEMPLATE = (
+    "**Username:** {username}\n"
+    "**Full Name:** {full_name}\n"
+)
+_CONFIRM_NOTE = MappingProxyType({
+    "whitelist": "**Note:** User will have permanent access regardless of channel membership.",
+    "ban": "**Warning:** User will be denied access even if they join required channels."
+})
+_USER_FOUND_TEMPLATE = (
+    "🔍 **User Found**\n\n"
+    "**User:** {mention}\n"
+    "**ID:** `{uid}`\n"
+    "**Status:** {access_status_text}\n"
+    "**Downloads:** {download_count}\n"
+)
+
 
 def admin_only(func):
     """Decorator to restrict commands to admins only"""
     async def wrapper(client: Client, message: Message):
-        admin_ids = get_admin_list()
-        if message.from_user.id not in admin_ids:
+        if message.from_user.id not in _ADMIN_IDS:
             await message.reply("❌ This command is for administrators only.")
             return
         return await func(client, message)
@@ -37,8 +96,7 @@ def admin_only(func):
 def admin_callback_only(func):
     """Decorator to restrict callbacks to admins only"""
     async def wrapper(client: Client, callback_query: CallbackQuery):
-        admin_ids = get_admin_list()
-        if callback_query.from_user.id not in admin_ids:
+        if callback_query.from_user.id not in _ADMIN_IDS:
             await callback_query.answer("❌ This action is for administrators only.", show_alert=True)
             return
         return await func(client, callback_query)
@@ -101,9 +159,61 @@ def create_confirm_keyboard(action: str, data: str = ""):
     ])
 
 
+def create_check_user_keyboard(target_user_id: int):
+    """Create the action keyboard shown under a checked user"""
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton("✅ Whitelist", callback_data=f"confirm_whitelist_{target_user_id}")],
+        [InlineKeyboardButton("❌ Ban", callback_data=f"confirm_ban_{target_user_id}")],
+        [InlineKeyboardButton("🔙 Back", callback_data="manual_access")]
+    ])
+
+
+def create_confirm_user_keyboard(action_type: str, target_user_id: int):
+    """Create the confirmation keyboard for whitelisting or banning a user"""
+    action_emoji = "✅" if action_type == "whitelist" else "❌"
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(f"{action_emoji} Confirm {action_type.title()}", callback_data=f"execute_{action_type}_user_{target_user_id}")],
+        [InlineKeyboardButton("❌ Cancel", callback_data="manual_access")]
+    ])
+
+
 # Temporary storage for admin operations
 admin_sessions = {}
 
+# Telegram profile cache: user_id -> (expires_at, (username, full_name)), least recently used first
+USER_PROFILE_TTL = 300
+USER_PROFILE_CACHE_MAX = 1024
+_user_profile_cache = OrderedDict()
+
+
+async def get_user_profile(client: Client, user_id: int):
+    """Get (username, full_name) for a user, caching the Telegram lookup"""
+    now = time.monotonic()
+    cached = _user_profile_cache.get(user_id)
+    if cached and cached[0] > now:
+        _user_profile_cache.move_to_end(user_id)
+        return cached[1]
+    
+    user_info = await client.get_users(user_id)
+    profile = (
+        user_info.username,
+        f"{user_info.first_name or ''} {user_info.last_name or ''}".strip()
+    )
+    _user_profile_cache[user_id] = (now + USER_PROFILE_TTL, profile)
+    _user_profile_cache.move_to_end(user_id)
+    if len(_user_profile_cache) > USER_PROFILE_CACHE_MAX:
+        _user_profile_cache.popitem(last=False)
+    return profile
+
+
+def search_users_page(status_filter: int = None, page_size: int = 15, peek: int = 5):
+    """Fetch one page of search results plus a count of up to `peek` more (runs in a worker thread)"""
+    # Only pull the rows that are shown, plus a few to report what is left
+    with closing(iter_search_users(status_filter=status_filter)) as users:
+        shown_users = list(islice(users, page_size))  # Limit to avoid message length issues
+        more_users = sum(1 for _ in islice(users, peek))
+    return shown_users, more_users
+
 
 @admin_only
 async def admin_command(client: Client, message: Message):
@@ -222,6 +332,8 @@ async def admin_callback_handler(client: Client, callback_query: CallbackQuery):
         success = remove_channel(channel_id)
         
         if success:
+            # Channel requirements changed for everyone
+            invalidate_access()
             await callback_query.answer("✅ Channel removed successfully", show_alert=True)
         else:
             await callback_query.answer("❌ Failed to remove channel", show_alert=True)
@@ -239,6 +351,7 @@ async def admin_callback_handler(client: Client, callback_query: CallbackQuery):
         channels = get_required_channels()
         for channel in channels:
             remove_channel(channel['id'])
+        invalidate_access()
         
         await callback_query.answer("✅ All channels removed", show_alert=True)
         await callback_query.edit_message_text(
@@ -264,7 +377,7 @@ async def admin_callback_handler(client: Client, callback_query: CallbackQuery):
         # Get comprehensive statistics
         stats = get_download_statistics()
         channels = get_required_channels()
-        admin_count = len(get_admin_list())
+        admin_count = len(_ADMIN_IDS)
         
         # Format file sizes
         def format_size(bytes_size):
@@ -348,7 +461,7 @@ async def admin_callback_handler(client: Client, callback_query: CallbackQuery):
         )
     
     elif data.startswith("search_"):
-        search_type = data.replace("search_", "")
+        search_type = data[7:]  # len("search_")
         status_filter = None
         
         if search_type == "whitelisted":
@@ -363,19 +476,25 @@ async def admin_callback_handler(client: Client, callback_query: CallbackQuery):
         else:
             title = "👥 All Users"
         
-        users = search_users(status_filter=status_filter, limit=20)
+        try:
+            shown_users, more_users = await asyncio.to_thread(search_users_page, status_filter)
+        except Exception as e:
+            logger.error("Failed to search users: %s", e, exc_info=True)
+            shown_users, more_users = None, 0
         
-        if not users:
+        if shown_users is None:
+            result_text = f"{title}\n\n❌ Failed to load users. Please try again."
+        elif not shown_users:
             result_text = f"{title}\n\nNo users found."
         else:
             result_text = f"{title}\n\n"
-            for user in users[:15]:  # Limit to avoid message length issues
+            for user in shown_users:
                 user_mention = f"<a href='tg://user?id={user['user_id']}'>{user['user_id']}</a>"
                 status_emoji = {"Banned": "❌", "Whitelisted": "✅", "Normal": "👤"}.get(user['access_status_text'], "❓")
                 result_text += f"{status_emoji} {user_mention} - {user['download_count']} downloads\n"
             
-            if len(users) > 15:
-                result_text += f"\n... and {len(users) - 15} more users"
+            if more_users:
+                result_text += f"\n... and {more_users} more users"
         
         await callback_query.edit_message_text(
             result_text,
@@ -397,6 +516,7 @@ async def admin_callback_handler(client: Client, callback_query: CallbackQuery):
             
             if action_type == "whitelist_user":
                 set_user_access_status(target_user_id, 1)
+                invalidate_access(target_user_id)
                 await callback_query.edit_message_text(
                     f"✅ **User Whitelisted Successfully**\n\n"
                     f"**User:** {target_mention}\n"
@@ -406,6 +526,7 @@ async def admin_callback_handler(client: Client, callback_query: CallbackQuery):
                 )
             elif action_type == "ban_user":
                 set_user_access_status(target_user_id, -1)
+                invalidate_access(target_user_id)
                 await callback_query.edit_message_text(
                     f"❌ **User Banned Successfully**\n\n"
                     f"**User:** {target_mention}\n"
@@ -424,9 +545,7 @@ async def admin_callback_handler(client: Client, callback_query: CallbackQuery):
         
         try:
             # Get user info
-            user_info = await client.get_users(target_user_id)
-            username = user_info.username
-            full_name = f"{user_info.first_name or ''} {user_info.last_name or ''}".strip()
+            username, full_name = await get_user_profile(client, target_user_id)
             mention = f"@{username}" if username else f"<a href='tg://user?id={target_user_id}'>{full_name or 'User'}</a>"
         except:
             mention = f"<a href='tg://user?id={target_user_id}'>User {target_user_id}</a>"
@@ -434,25 +553,20 @@ async def admin_callback_handler(client: Client, callback_query: CallbackQuery):
         current_status = get_user_access_status(target_user_id)
         action_emoji = "✅" if action_type == "whitelist" else "❌"
         
-        confirm_text = (
-            f"{action_emoji} **Confirm {action_type.title()}**\n\n"
-            f"**User:** {mention}\n"
-            f"**ID:** `{target_user_id}`\n"
-            f"**Current Status:** {['Normal', 'Whitelisted', '', 'Banned'][current_status + 1]}\n\n"
-            f"Are you sure you want to **{action_type}** this user?"
-        )
-        
-        if action_type == "whitelist":
-            confirm_text += "\n\n**Note:** User will have permanent access regardless of channel membership."
-        else:
-            confirm_text += "\n\n**Warning:** User will be denied access even if they join required channels."
+        confirm_text = _CONFIRM_ACTION_TEMPLATE.format_map({
+            'emoji': action_emoji,
+            'title': action_type.title(),
+            'mention': mention,
+            'uid': target_user_id,
+            'profile': "",
+            'status': _STATUS_LABEL_BY_ACCESS.get(current_status, 'Unknown'),
+            'action': action_type,
+            'note': _CONFIRM_NOTE[action_type]
+        })
         
         await callback_query.edit_message_text(
             confirm_text,
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton(f"{action_emoji} Confirm {action_type.title()}", callback_data=f"execute_{action_type}_user_{target_user_id}")],
-                [InlineKeyboardButton("❌ Cancel", callback_data="manual_access")]
-            ])
+            reply_markup=create_confirm_user_keyboard(action_type, target_user_id)
         )
     
     elif data.startswith("user_details_"):
@@ -460,9 +574,7 @@ async def admin_callback_handler(client: Client, callback_query: CallbackQuery):
         
         try:
             # Get user info from Telegram
-            user_info = await client.get_users(target_user_id)
-            username = user_info.username
-            full_name = f"{user_info.first_name or ''} {user_info.last_name or ''}".strip()
+            username, full_name = await get_user_profile(client, target_user_id)
             mention = f"@{username}" if username else f"<a href='tg://user?id={target_user_id}'>{full_name or 'User'}</a>"
         except:
             mention = f"<a href='tg://user?id={target_user_id}'>User {target_user_id}</a>"
@@ -470,28 +582,17 @@ async def admin_callback_handler(client: Client, callback_query: CallbackQuery):
             full_name = "Unknown"
         
         current_status = get_user_access_status(target_user_id)
-        status_text = {
-            -1: "❌ **Banned**",
-            0: "👤 **Normal** (subject to channel membership)",
-            1: "✅ **Whitelisted** (always has access)"
-        }
-        
         # Get user's download stats
         download_stats = get_user_download_stats(target_user_id)
         
-        user_details = (
-            f"🔍 **User Information**\n\n"
-            f"**User:** {mention}\n"
-            f"**ID:** `{target_user_id}`\n"
-            f"**Username:** {f'@{username}' if username else 'None'}\n"
-            f"**Full Name:** {full_name or 'Unknown'}\n"
-            f"**Status:** {status_text.get(current_status, 'Unknown')}\n\n"
-            f"**📊 Download Statistics:**\n"
-            f"• Total Downloads: {download_stats['total_downloads']}\n"
-            f"• Successful: {download_stats['successful_downloads']}\n"
-            f"• Success Rate: {download_stats['success_rate']}%\n"
-            f"• Avg Time: {download_stats['avg_download_time']}s\n"
-        )
+        user_details = _USER_DETAILS_TEMPLATE.format_map({
+            **download_stats,
+            'mention': mention,
+            'uid': target_user_id,
+            'username': f'@{username}' if username else 'None',
+            'full_name': full_name or 'Unknown',
+            'status': _STATUS_TEXT.get(current_status, 'Unknown')
+        })
         
         if download_stats['platform_breakdown']:
             user_details += "\n**Platform Usage:**\n"
@@ -518,6 +619,7 @@ async def admin_callback_handler(client: Client, callback_query: CallbackQuery):
     elif data.startswith("reset_user_"):
         target_user_id = int(data.split("_")[-1])
         set_user_access_status(target_user_id, 0)
+        invalidate_access(target_user_id)
         
         await callback_query.answer("✅ User status reset to Normal", show_alert=True)
         await callback_query.edit_message_text(
@@ -541,11 +643,11 @@ async def admin_callback_handler(client: Client, callback_query: CallbackQuery):
             logger.info(f"Cleared admin session for user {user_id} on main menu navigation")
         
         # Import keyboard functions here to avoid circular import
-        from keyboards.main import create_admin_keyboard, create_main_keyboard
+        from keyboards.main import ADMIN_KEYBOARD, MAIN_KEYBOARD
         from utils.access_control import is_admin
         
         is_admin_user = await is_admin(client, user_id)
-        keyboard = create_admin_keyboard() if is_admin_user else create_main_keyboard()
+        keyboard = ADMIN_KEYBOARD if is_admin_user else MAIN_KEYBOARD
         
         await callback_query.edit_message_text(
             "🏠 **Main Menu**\n\nChoose an option:",
@@ -553,6 +655,22 @@ async def admin_callback_handler(client: Client, callback_query: CallbackQuery):
         )
 
 
+# Per-admin (monotonic time, text) of the last handled session message
+ADMIN_DEBOUNCE_SECONDS = 0.2
+_admin_last_action = {}
+
+
+def _is_admin_replay(user_id: int, text: str) -> bool:
+    """Return True if the admin sent this same session message moments ago"""
+    now = time.monotonic()
+    last = _admin_last_action.get(user_id)
+    if last is not None and now - last[0] < ADMIN_DEBOUNCE_SECONDS and last[1] == text:
+        return True
+    
+    _admin_last_action[user_id] = (now, text)
+    return False
+
+
 async def handle_admin_message(client: Client, message: Message):
     """Handle admin session messages"""
     user_id = message.from_user.id
@@ -560,7 +678,7 @@ async def handle_admin_message(client: Client, message: Message):
     logging.info(f"[ADMIN_HANDLER] Processing message from user {user_id}: {message.text}")
     
     # Check if user is admin
-    if user_id not in get_admin_list():
+    if user_id not in _ADMIN_IDS:
         logging.info(f"[ADMIN_HANDLER] User {user_id} is not admin, skipping")
         return
     
@@ -569,6 +687,10 @@ async def handle_admin_message(client: Client, message: Message):
         logging.info(f"[ADMIN_HANDLER] User {user_id} has no active session, skipping")
         return
     
+    if _is_admin_replay(user_id, message.text):
+        logging.info(f"[ADMIN_HANDLER] Ignoring repeated message from user {user_id}")
+        return
+    
     session = admin_sessions[user_id]
     action = session.get("action")
     
@@ -583,32 +705,18 @@ async def handle_admin_message(client: Client, message: Message):
 
 
 def admin_session_filter(_, __, message):
-    """Custom filter for admin messages with active sessions"""
-    if not message.from_user:
-        logging.debug("[ADMIN_FILTER] No from_user, skipping")
-        return False
-    
-    user_id = message.from_user.id
-    
-    # Check if user is admin
-    if user_id not in get_admin_list():
-        logging.debug(f"[ADMIN_FILTER] User {user_id} is not admin, skipping")
-        return False
+    """Custom filter for admin messages with active sessions
     
-    # Check if user has active session
-    if user_id not in admin_sessions:
-        logging.debug(f"[ADMIN_FILTER] User {user_id} has no active session, skipping")
-        return False
-    
-    # Don't process commands
-    if message.text and message.text.startswith('/'):
-        logging.debug(f"[ADMIN_FILTER] User {user_id} sent command, skipping")
-        return False
-    
-    # Log that filter matched
-    logging.info(f"[ADMIN_FILTER] Filter matched for user {user_id} with session: {admin_sessions.get(user_id)}")
-    
-    return True
+    Runs for every private message, so it sticks to set/dict membership checks.
+    """
+    user = message.from_user
+    return (
+        user is not None
+        and user.id in _ADMIN_IDS
+        and user.id in admin_sessions
+        # Don't process commands
+        and not (message.text or "").startswith('/')
+    )
 
 
 # Create the custom filter
@@ -649,7 +757,7 @@ async def handle_add_channel_message(client: Client, message: Message, session:
             elif text.startswith("https://t.me/"):
                 username = text.replace("https://t.me/", "")
                 channel_link = text
-            elif re.match(r'^[a-zA-Z][\w\d_]{4,31}$', text):  # Username without @
+            elif _USERNAME_RE.match(text):  # Username without @
                 username = text
                 channel_link = f"https://t.me/{text}"
             elif text.lstrip('-').isdigit():  # Channel ID
@@ -695,6 +803,8 @@ async def handle_add_channel_message(client: Client, message: Message, session:
         success = add_channel(channel_id, channel_name, channel_link, user_id)
         
         if success:
+            # Channel requirements changed for everyone
+            invalidate_access()
             await message.reply(
                 f"✅ **Channel Added Successfully**\n\n"
                 f"**Name:** {channel_name}\n"
@@ -765,33 +875,26 @@ async def handle_user_management_message(client: Client, message: Message, sessi
             return
         
         # Get current user status from database
-        current_status = get_user_access_status(target_user_id)
-        user_info = get_user_info(target_user_id)
+        if action == "check_user":
+            # The three reads are independent, overlap them in worker threads
+            current_status, user_info, download_stats = await asyncio.gather(
+                asyncio.to_thread(get_user_access_status, target_user_id),
+                asyncio.to_thread(get_user_info, target_user_id),
+                asyncio.to_thread(get_user_download_stats, target_user_id)
+            )
+        else:
+            current_status = get_user_access_status(target_user_id)
         
         # Perform action
         if action == "check_user":
-            status_text = {
-                -1: "❌ **Banned**",
-                0: "👤 **Normal** (subject to channel membership)",
-                1: "✅ **Whitelisted** (always has access)"
-            }
-            
-            # Get user's download stats
-            download_stats = get_user_download_stats(target_user_id)
-            
-            user_details = (
-                f"🔍 **User Information**\n\n"
-                f"**User:** {target_mention}\n"
-                f"**ID:** `{target_user_id}`\n"
-                f"**Username:** {f'@{target_username}' if target_username else 'None'}\n"
-                f"**Full Name:** {target_full_name or 'Unknown'}\n"
-                f"**Status:** {status_text.get(current_status, 'Unknown')}\n\n"
-                f"**📊 Download Statistics:**\n"
-                f"• Total Downloads: {download_stats['total_downloads']}\n"
-                f"• Successful: {download_stats['successful_downloads']}\n"
-                f"• Success Rate: {download_stats['success_rate']}%\n"
-                f"• Avg Time: {download_stats['avg_download_time']}s\n"
-            )
+            user_details = _USER_DETAILS_TEMPLATE.format_map({
+                **download_stats,
+                'mention': target_mention,
+                'uid': target_user_id,
+                'username': f'@{target_username}' if target_username else 'None',
+                'full_name': target_full_name or 'Unknown',
+                'status': _STATUS_TEXT.get(current_status, 'Unknown')
+            })
             
             if download_stats['platform_breakdown']:
                 user_details += "\n**Platform Usage:**\n"
@@ -800,11 +903,7 @@ async def handle_user_management_message(client: Client, message: Message, sessi
             
             await message.reply(
                 user_details,
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("✅ Whitelist", callback_data=f"confirm_whitelist_{target_user_id}")],
-                    [InlineKeyboardButton("❌ Ban", callback_data=f"confirm_ban_{target_user_id}")],
-                    [InlineKeyboardButton("🔙 Back", callback_data="manual_access")]
-                ])
+                reply_markup=create_check_user_keyboard(target_user_id)
             )
         
         elif action in ["whitelist_user", "ban_user"]:
@@ -822,27 +921,23 @@ async def handle_user_management_message(client: Client, message: Message, sessi
             action_text = "whitelist" if action == "whitelist_user" else "ban"
             action_emoji = "✅" if action == "whitelist_user" else "❌"
             
-            confirm_text = (
-                f"{action_emoji} **Confirm {action_text.title()}**\n\n"
-                f"**User:** {target_mention}\n"
-                f"**ID:** `{target_user_id}`\n"
-                f"**Username:** {f'@{target_username}' if target_username else 'None'}\n"
-                f"**Full Name:** {target_full_name or 'Unknown'}\n"
-                f"**Current Status:** {['Normal', 'Whitelisted', '', 'Banned'][current_status + 1]}\n\n"
-                f"Are you sure you want to **{action_text}** this user?"
-            )
-            
-            if action == "whitelist_user":
-                confirm_text += "\n\n**Note:** User will have permanent access regardless of channel membership."
-            else:
-                confirm_text += "\n\n**Warning:** User will be denied access even if they join required channels."
+            confirm_text = _CONFIRM_ACTION_TEMPLATE.format_map({
+                'emoji': action_emoji,
+                'title': action_text.title(),
+                'mention': target_mention,
+                'uid': target_user_id,
+                'profile': _CONFIRM_PROFILE_TEMPLATE.format_map({
+                    'username': f'@{target_username}' if target_username else 'None',
+                    'full_name': target_full_name or 'Unknown'
+                }),
+                'status': _STATUS_LABEL_BY_ACCESS.get(current_status, 'Unknown'),
+                'action': action_text,
+                'note': _CONFIRM_NOTE[action_text]
+            })
             
             await message.reply(
                 confirm_text,
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton(f"{action_emoji} Confirm {action_text.title()}", callback_data=f"execute_{action}_{target_user_id}")],
-                    [InlineKeyboardButton("❌ Cancel", callback_data="manual_access")]
-                ])
+                reply_markup=create_confirm_user_keyboard(action_text, target_user_id)
             )
         
         # Clear session for check_user, keep for confirmation actions
@@ -864,27 +959,22 @@ async def handle_user_search_message(client: Client, message: Message, session:
         if search_term.isdigit():
             # Search for specific user ID
             target_user_id = int(search_term)
-            users = search_users(search_term=search_term, limit=1)
+            user = await asyncio.to_thread(get_user_by_id, target_user_id)
             
-            if users:
-                user = users[0]
+            if user:
                 try:
                     # Get user info from Telegram
-                    user_info = await client.get_users(target_user_id)
-                    username = user_info.username
-                    full_name = f"{user_info.first_name or ''} {user_info.last_name or ''}".strip()
+                    username, full_name = await get_user_profile(client, target_user_id)
                     
                     mention = f"@{username}" if username else f"<a href='tg://user?id={target_user_id}'>{full_name or 'User'}</a>"
                 except:
                     mention = f"<a href='tg://user?id={target_user_id}'>User {target_user_id}</a>"
                 
-                result_text = (
-                    f"🔍 **User Found**\n\n"
-                    f"**User:** {mention}\n"
-                    f"**ID:** `{target_user_id}`\n"
-                    f"**Status:** {user['access_status_text']}\n"
-                    f"**Downloads:** {user['download_count']}\n"
-                )
+                result_text = _USER_FOUND_TEMPLATE.format_map({
+                    **user,
+                    'mention': mention,
+                    'uid': target_user_id
+                })
                 
                 await message.reply(
                     result_text,
@@ -921,11 +1011,16 @@ def get_channel_url(channel: Dict) -> str:
     Returns:
         str: A valid Telegram channel URL
     """
+    return _get_channel_url_impl(channel.get('channel_link'), channel['channel_id'])
+
+
+@functools.lru_cache(maxsize=4096)
+def _get_channel_url_impl(channel_link: str, channel_id: int) -> str:
+    """Build the channel URL from hashable values so results can be cached."""
     # Use stored channel link if available and valid
-    if channel.get('channel_link') and channel['channel_link'].startswith('https://t.me/'):
-        return channel['channel_link']
+    if channel_link and channel_link.startswith('https://t.me/'):
+        return channel_link
     
-    channel_id = channel['channel_id']
     channel_id_str = str(channel_id)
     
     # For supergroup/channel IDs that start with -100
@@ -944,6 +1039,18 @@ def get_channel_url(channel: Dict) -> str:
 
 
 # Register handlers
+# Callback data owned by the admin panel, matched by prefix
+_ADMIN_CALLBACK_PREFIXES = (
+    "access_menu", "manage_channels", "manual_access", "add_channel", "remove_channel_",
+    "remove_all_channels", "confirm_", "whitelist_user", "ban_user", "check_user", "access_stats",
+    "top_users", "user_search", "search_", "execute_", "user_details_", "reset_user_",
+    "close_admin", "main_menu",
+)
+admin_callback = filters.create(
+    lambda _, __, query: bool(query.data) and query.data.startswith(_ADMIN_CALLBACK_PREFIXES)
+)
+
+
 def register_admin_handlers(app):
     """Register all admin handlers"""
     # Register admin message handler FIRST with highest priority (group 0)
@@ -951,4 +1058,4 @@ def register_admin_handlers(app):
     
     # Register other admin handlers
     app.on_message(filters.command("admin") & filters.private)(admin_command)
-    app.on_callback_query(filters.regex(r"^(access_menu|manage_channels|manual_access|add_channel|remove_channel_|remove_all_channels|confirm_|whitelist_user|ban_user|check_user|access_stats|top_users|user_search|search_|execute_|user_details_|reset_user_|close_admin|main_menu).*"))(admin_callback_handler)
+    app.on_callback_query(admin_callback)(admin_callback_handler)
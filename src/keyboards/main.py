@@ -4,12 +4,17 @@
 # ytdlbot - keyboards/main.py
 # Keyboard layouts for the Telegram bot
 
+import functools
+
 try:
     from pyrogram import types
 except ImportError:
     from kurigram import types
 
-from engine.youtube_formats import get_format_display_name
+from engine.youtube_formats import get_format_display_name_short
+
+# Button label template shared by the format selection rows
+_FORMAT_BUTTON_LABEL = "{icon} {name}".format
 
 
 def create_main_keyboard():
@@ -39,48 +44,41 @@ def create_youtube_format_keyboard(formats_dict: dict):
     Returns:
         types.InlineKeyboardMarkup: Keyboard with format options
     """
-    buttons = []
+    rows = []
     
     # Add video formats (limit to top 8 to avoid too many buttons)
-    video_formats = formats_dict.get('video_formats', [])
-    shown_video = 0
-    for i, fmt in enumerate(video_formats):
-        if shown_video >= 8:  # Limit number of options
+    heights_shown = set()
+    for fmt in formats_dict.get('video_formats', []):
+        if len(heights_shown) >= 8:  # Limit number of options
             break
             
         # Skip if no height info or duplicate heights
-        if not fmt.get('height'):
-            continue
-            
-        # Check if we already have this height
-        heights_shown = [v.get('height') for v in video_formats[:i] if v.get('height')]
-        if fmt.get('height') in heights_shown:
+        height = fmt.get('height')
+        if not height or height in heights_shown:
             continue
+        heights_shown.add(height)
             
-        display_name = f"📽️ {get_format_display_name(fmt)}"
-        if len(display_name) > 30:  # Limit button text length
-            display_name = display_name[:27] + "..."
-            
-        callback_data = f"ytfmt_v_{fmt['format_id']}"
-        buttons.append([types.InlineKeyboardButton(display_name, callback_data=callback_data)])
-        shown_video += 1
+        # Limit button text length to 30 characters including the icon
+        display_name = _FORMAT_BUTTON_LABEL(icon="📽️", name=get_format_display_name_short(fmt, 27))
+        rows.append((display_name, f"ytfmt_v_{fmt['format_id']}"))
     
     # Add audio formats (limit to top 3)
-    audio_formats = formats_dict.get('audio_formats', [])
-    if audio_formats:
-        
-        
-        for i, fmt in enumerate(audio_formats[:3]):
-            display_name = f"🎵 {get_format_display_name(fmt)}"
-            if len(display_name) > 30:
-                display_name = display_name[:27] + "..."
-                
-            callback_data = f"ytfmt_a_{fmt['format_id']}"
-            buttons.append([types.InlineKeyboardButton(display_name, callback_data=callback_data)])
+    for fmt in formats_dict.get('audio_formats', [])[:3]:
+        display_name = _FORMAT_BUTTON_LABEL(icon="🎵", name=get_format_display_name_short(fmt, 28))
+        rows.append((display_name, f"ytfmt_a_{fmt['format_id']}"))
+    
+    return _youtube_format_markup(tuple(rows))
+
+
+@functools.lru_cache(maxsize=256)
+def _youtube_format_markup(rows: tuple):
+    """Build (and reuse) the markup for a given tuple of (label, callback_data) rows"""
+    Button = types.InlineKeyboardButton
+    buttons = [[Button(label, callback_data=callback_data)] for label, callback_data in rows]
     
     # Add cancel button
     buttons.append([
-        types.InlineKeyboardButton("❌ Cancel", callback_data="ytfmt_cancel")
+        Button("❌ Cancel", callback_data="ytfmt_cancel")
     ])
     
     return types.InlineKeyboardMarkup(buttons)
@@ -94,12 +92,22 @@ def create_back_keyboard(callback_data: str = "main_menu"):
     return keyboard
 
 
+def create_stats_keyboard(refresh_data: str = "stats"):
+    """Create the refresh / main menu keyboard shown under statistics."""
+    Button = types.InlineKeyboardButton
+    return types.InlineKeyboardMarkup([
+        [Button("🔄 Refresh", callback_data=refresh_data)],
+        [Button("🏠 Main Menu", callback_data="main_menu")]
+    ])
+
+
 def create_confirmation_keyboard(action: str, item_id: str = ""):
     """Create a confirmation keyboard for dangerous actions."""
+    Button = types.InlineKeyboardButton
     keyboard = types.InlineKeyboardMarkup([
         [
-            types.InlineKeyboardButton("✅ Confirm", callback_data=f"confirm_{action}_{item_id}"),
-            types.InlineKeyboardButton("❌ Cancel", callback_data="cancel_action")
+            Button("✅ Confirm", callback_data=f"confirm_{action}_{item_id}"),
+            Button("❌ Cancel", callback_data="cancel_action")
         ]
     ])
     return keyboard
@@ -107,20 +115,35 @@ def create_confirmation_keyboard(action: str, item_id: str = ""):
 
 def create_pagination_keyboard(current_page: int, total_pages: int, prefix: str):
     """Create a pagination keyboard."""
+    return _pagination_markup(prefix, current_page, total_pages)
+
+
+@functools.lru_cache(maxsize=512)
+def _pagination_markup(prefix: str, current_page: int, total_pages: int):
+    """Build the pagination keyboard; cached since page renders repeat."""
+    Button = types.InlineKeyboardButton
     buttons = []
     
     nav_buttons = []
     if current_page > 1:
-        nav_buttons.append(types.InlineKeyboardButton("⬅️ Previous", callback_data=f"{prefix}_page_{current_page-1}"))
+        nav_buttons.append(Button("⬅️ Previous", callback_data=f"{prefix}_page_{current_page-1}"))
     
-    nav_buttons.append(types.InlineKeyboardButton(f"{current_page}/{total_pages}", callback_data="page_info"))
+    nav_buttons.append(Button(f"{current_page}/{total_pages}", callback_data="page_info"))
     
     if current_page < total_pages:
-        nav_buttons.append(types.InlineKeyboardButton("➡️ Next", callback_data=f"{prefix}_page_{current_page+1}"))
+        nav_buttons.append(Button("➡️ Next", callback_data=f"{prefix}_page_{current_page+1}"))
     
     if nav_buttons:
         buttons.append(nav_buttons)
     
-    buttons.append([types.InlineKeyboardButton("🔙 Back", callback_data="main_menu")])
+    buttons.append([Button("🔙 Back", callback_data="main_menu")])
     
     return types.InlineKeyboardMarkup(buttons)
+
+
+# Static keyboards never change, build them once and share them between handlers
+MAIN_KEYBOARD = create_main_keyboard()
+ADMIN_KEYBOARD = create_admin_keyboard()
+BACK_KEYBOARD = create_back_keyboard()
+STATS_KEYBOARD = create_stats_keyboard()
+ADMIN_STATS_KEYBOARD = create_stats_keyboard("admin_stats")
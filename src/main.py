@@ -8,14 +8,12 @@ import re
 import threading
 import time
 import typing
-from io import BytesIO
+from collections import OrderedDict
 from typing import Any
 
 import psutil
 import pyrogram.errors
-import yt_dlp
-from apscheduler.schedulers.background import BackgroundScheduler
-from pyrogram import Client, enums, filters, types
+from pyrogram import Client, enums, filters, idle, types
 
 from config import (
     APP_HASH,
@@ -24,6 +22,7 @@ from config import (
     ENABLE_ARIA2,
     ENABLE_FFMPEG,
     M3U8_SUPPORT,
+    MAX_CONCURRENT_DOWNLOADS,
     BotText,
 )
 from database.model import (
@@ -31,6 +30,7 @@ from database.model import (
     get_quality_settings,
     get_user_access_status,
     init_user,
+    initialized_users,
     set_user_settings,
     get_user_platform_quality,
     set_user_platform_quality,
@@ -42,24 +42,24 @@ from database.model import (
     log_download_completion,
 )
 from engine import direct_entrance, youtube_entrance, special_download_entrance
-from engine.youtube_formats import extract_youtube_formats, is_youtube_url
+from engine.youtube_formats import extract_youtube_formats
 from handlers.admin import register_admin_handlers
-from utils.access_control import get_admin_list
+from utils.access_control import get_admin_set
 from keyboards.main import (
-    create_main_keyboard,
-    create_admin_keyboard,
+    MAIN_KEYBOARD,
+    ADMIN_KEYBOARD,
+    BACK_KEYBOARD,
+    STATS_KEYBOARD,
+    ADMIN_STATS_KEYBOARD,
     create_youtube_format_keyboard,
-    create_back_keyboard,
 )
 from utils import extract_url_and_name, sizeof_fmt, timeof_fmt
-from utils.access_control import check_full_user_access, get_access_denied_message, is_admin
-from utils.decorators import private_use, private_use_callback
+from utils.access_control import is_admin
+from utils.decorators import private_use, private_use_callback, current_user_is_admin, get_cached_access, invalidate_access
 from utils.middleware import create_access_middleware, admin_only, get_comprehensive_denial_message
 from utils.stats_logger import start_stats_logging, stop_stats_logging
 from utils.error_handling import setup_comprehensive_logging, error_handler, download_error_handler
 
-logging.getLogger("apscheduler.executors.default").propagate = False
-
 
 def create_app(name: str, workers: int = 64) -> Client:
     return Client(
@@ -75,58 +75,59 @@ def create_app(name: str, workers: int = 64) -> Client:
 
 app = create_app("main")
 
+# Routing patterns, compiled once at import
+_YT_FORMAT_PREFIX = "yt_format_"
+_YTFMT_VIDEO_PREFIX = "ytfmt_v_"
+_YTFMT_AUDIO_PREFIX = "ytfmt_a_"
 
+MAIN_MENU_TEXT = "🏠 **Main Menu**\n\nChoose an option:"
 
-def private_use_callback(func):
-    """Decorator for callback query handlers with access control"""
-    async def wrapper(client: Client, callback_query: types.CallbackQuery):
-        chat_id = getattr(callback_query.from_user, "id", None)
 
-        # Only allow private chats for this bot now
-        if callback_query.message.chat.type != enums.ChatType.PRIVATE:
-            logging.debug("Ignoring group/channel callback: %s", callback_query.data)
-            await callback_query.answer("❌ This bot only works in private chats.")
-            return
+async def ensure_user(uid: int):
+    """Create the user's row on first contact; known users skip the DB and the thread hop"""
+    if uid not in initialized_users:
+        await asyncio.to_thread(init_user, uid)
 
-        # Access control check
-        if chat_id:
-            try:
-                access_result = await check_full_user_access(client, chat_id)
-                if not access_result['has_access']:
-                    denial_message = get_access_denied_message(access_result)
-                    await callback_query.answer("❌ Access denied", show_alert=True)
-                    logging.info(f"Access denied for user {chat_id}: {access_result['reason']}")
-                    return
-                
-                # Log successful access
-                logging.debug(f"Callback access granted for user {chat_id}: {access_result['reason']}")
-                
-            except Exception as e:
-                logging.error(f"Error checking access for user {chat_id}: {e}")
-                await callback_query.answer("❌ Access check failed", show_alert=True)
-                return
 
-        return await func(client, callback_query)
+# Fire-and-forget tasks; the loop only keeps weak references, so hold them until done
+_background_tasks: set[asyncio.Task] = set()
 
-    return wrapper
+
+def _background_task_done(task: asyncio.Task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logging.warning("Background task failed: %s", task.exception())
+
+
+def run_in_background(coro) -> asyncio.Task:
+    """Schedule a coroutine without awaiting it, keeping it alive and logging a failure"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_task_done)
+    return task
+
+
+def send_typing(client: Client, chat_id: int) -> asyncio.Task:
+    """Show "typing..." without waiting for Telegram to acknowledge it"""
+    return run_in_background(client.send_chat_action(chat_id, enums.ChatAction.TYPING))
 
 
-@app.on_callback_query(filters.regex(r"^check_access$"))
 async def check_access_callback(client: Client, callback_query: types.CallbackQuery):
     """Handle access check button from denial message"""
     user_id = callback_query.from_user.id
     
     try:
-        # Re-check user access
-        access_result = await check_full_user_access(client, user_id)
+        # Re-check user access, ignoring any cached denial
+        invalidate_access(user_id)
+        access_result = await get_cached_access(client, user_id)
         
-        if access_result['has_access']:
+        if access_result.has_access:
             # User now has access
             await callback_query.answer("✅ Access granted! You can now use the bot.", show_alert=True)
             
             # Show main menu
             admin_status = await is_admin(client, user_id)
-            keyboard = create_admin_keyboard() if admin_status else create_main_keyboard()
+            keyboard = ADMIN_KEYBOARD if admin_status else MAIN_KEYBOARD
             
             await callback_query.edit_message_text(
                 "✅ **Access Granted**\n\n"
@@ -149,17 +150,17 @@ async def check_access_callback(client: Client, callback_query: types.CallbackQu
 @error_handler
 async def start_handler(client: Client, message: types.Message):
     from_id = message.chat.id
-    init_user(from_id)
+    await ensure_user(from_id)
     
     # Log user activity
-    log_user_activity(from_id, 'start', {'command': 'start'})
+    queue_db_log(log_user_activity, from_id, 'start', {'command': 'start'})
     
     logging.info("%s welcome to youtube-dl bot!", message.from_user.id)
-    await client.send_chat_action(from_id, enums.ChatAction.TYPING)
+    send_typing(client, from_id)
     
     # Check if user is admin to show admin keyboard
     admin_status = await is_admin(client, from_id)
-    keyboard = create_admin_keyboard() if admin_status else create_main_keyboard()
+    keyboard = ADMIN_KEYBOARD if admin_status else MAIN_KEYBOARD
     
     await client.send_message(
         from_id,
@@ -169,138 +170,466 @@ async def start_handler(client: Client, message: types.Message):
     )
 
 
+# System stats shared by the stats views
+# Core counts and boot time never change while the bot runs
+CPU_PHYSICAL_CORES = psutil.cpu_count(logical=False)
+CPU_TOTAL_CORES = psutil.cpu_count(logical=True)
+BOOT_TIME = psutil.boot_time()
+# Prime the CPU sampler so the first stats view doesn't report 0.0%
+psutil.cpu_percent(interval=None)
+
+# Sampled in the background so the stats views only read the latest snapshot
+STATS_REFRESH_INTERVAL = 3.0
+# The refresher stops once nobody has asked for stats for this long
+STATS_IDLE_TIMEOUT = 60.0
+_stats_cache = {"data": None, "task": None, "last_used": 0.0}
+
+
+def collect_system_stats(cpu_usage: float) -> dict:
+    """Read the psutil counters shown in the stats views in one pass"""
+    total, used, free, disk = psutil.disk_usage("/")
+    return {
+        "cpu_usage": cpu_usage,
+        "memory": psutil.virtual_memory(),
+        "swap": psutil.swap_memory(),
+        "disk_total": total,
+        "disk_used": used,
+        "disk_free": free,
+        "disk_percent": disk,
+        "net_io": psutil.net_io_counters(),
+    }
+
+
+async def sample_system_stats() -> dict:
+    """Take a stats snapshot, with the /proc reads in a worker thread"""
+    # cpu_percent(interval=None) measures since the previous call from the same
+    # thread, so sample it here on the loop thread rather than in the thread pool
+    cpu_usage = psutil.cpu_percent(interval=None)
+    return await asyncio.to_thread(collect_system_stats, cpu_usage)
+
+
+async def refresh_system_stats():
+    """Re-sample system stats every STATS_REFRESH_INTERVAL seconds while they are being viewed"""
+    try:
+        while time.monotonic() - _stats_cache["last_used"] < STATS_IDLE_TIMEOUT:
+            await asyncio.sleep(STATS_REFRESH_INTERVAL)
+            try:
+                _stats_cache["data"] = await sample_system_stats()
+            except Exception as e:
+                logging.warning(f"Failed to refresh system stats: {e}")
+    finally:
+        # Idle (or cancelled): drop the snapshot so the next viewer gets a fresh one
+        _stats_cache["task"] = None
+        _stats_cache["data"] = None
+
+
+async def get_system_stats() -> dict:
+    """Return the latest system stats snapshot, starting the refresher on first use"""
+    _stats_cache["last_used"] = time.monotonic()
+    if _stats_cache["task"] is None:
+        _stats_cache["task"] = run_in_background(refresh_system_stats())
+    if _stats_cache["data"] is None:
+        _stats_cache["data"] = await sample_system_stats()
+    return _stats_cache["data"]
+
+
+_BOT_STATS_TEMPLATE = """📊 **Bot Statistics**
+
+🤖 **System Status:**
+• CPU Usage: {cpu_usage}%
+• RAM Usage: {ram_percent}%
+• Disk Usage: {disk_percent}%
+• Bot Uptime: {bot_uptime}
+
+📈 **Download Statistics:**
+• Total Downloads: {total_downloads}
+• Successful: {successful_downloads}
+• Failed: {failed_downloads}
+• Downloads Today: {recent_downloads_24h}
+
+👥 **User Statistics:**
+• Total Users: {total_users}
+• Your Downloads: {user_downloads}
+• Your Success Rate: {user_success_rate}%
+
+💾 **Storage:**
+• Total Space: {disk_total}
+• Used: {disk_used}
+• Free: {disk_free}"""
+
+
+_OWNER_STATS_TEMPLATE = (
+    "\n\n⌬─────「 Stats 」─────⌬\n\n"
+    "<b>╭🖥️ **CPU Usage »**</b>  __{cpu_usage}%__\n"
+    "<b>├💾 **RAM Usage »**</b>  __{ram_percent}%__\n"
+    "<b>╰🗃️ **DISK Usage »**</b>  __{disk_percent}%__\n\n"
+    "<b>╭📤Upload:</b> {bytes_sent}\n"
+    "<b>╰📥Download:</b> {bytes_recv}\n\n\n"
+    "<b>Memory Total:</b> {memory_total}\n"
+    "<b>Memory Free:</b> {memory_free}\n"
+    "<b>Memory Used:</b> {memory_used}\n"
+    "<b>SWAP Total:</b> {swap_total} | <b>SWAP Usage:</b> {swap_percent}%\n\n"
+    "<b>Total Disk Space:</b> {disk_total}\n"
+    "<b>Used:</b> {disk_used} | <b>Free:</b> {disk_free}\n\n"
+    "<b>Physical Cores:</b> {physical_cores}\n"
+    "<b>Total Cores:</b> {total_cores}\n\n"
+    "<b>🤖Bot Uptime:</b> {bot_uptime}\n"
+    "<b>⏲️OS Uptime:</b> {os_uptime}\n"
+)
+
+_USER_STATS_TEMPLATE = (
+    "\n\n⌬─────「 Stats 」─────⌬\n\n"
+    "<b>╭🖥️ **CPU Usage »**</b>  __{cpu_usage}%__\n"
+    "<b>├💾 **RAM Usage »**</b>  __{ram_percent}%__\n"
+    "<b>╰🗃️ **DISK Usage »**</b>  __{disk_percent}%__\n\n"
+    "<b>╭📤Upload:</b> {bytes_sent}\n"
+    "<b>╰📥Download:</b> {bytes_recv}\n\n\n"
+    "<b>Memory Total:</b> {memory_total}\n"
+    "<b>Memory Free:</b> {memory_free}\n"
+    "<b>Memory Used:</b> {memory_used}\n"
+    "<b>Total Disk Space:</b> {disk_total}\n"
+    "<b>Used:</b> {disk_used} | <b>Free:</b> {disk_free}\n\n"
+    "<b>🤖Bot Uptime:</b> {bot_uptime}\n"
+)
+
+
+async def build_bot_stats_text(chat_id: int) -> str:
+    """Render the bot statistics page shown by the stats and admin_stats buttons"""
+    from database.model import get_download_statistics, get_user_download_stats
+    
+    # Get system stats
+    system_stats = await get_system_stats()
+    
+    # Get download statistics
+    try:
+        stats = await asyncio.to_thread(get_download_statistics)
+        user_stats = await asyncio.to_thread(get_user_download_stats, chat_id)
+    except Exception as e:
+        logging.error(f"Error getting download stats: {e}")
+        stats = {}
+        user_stats = {}
+    
+    return _BOT_STATS_TEMPLATE.format(
+        cpu_usage=system_stats["cpu_usage"],
+        ram_percent=system_stats["memory"].percent,
+        disk_percent=system_stats["disk_percent"],
+        bot_uptime=timeof_fmt(time.time() - botStartTime),
+        total_downloads=stats.get('total_downloads', 0),
+        successful_downloads=stats.get('successful_downloads', 0),
+        failed_downloads=stats.get('failed_downloads', 0),
+        recent_downloads_24h=stats.get('recent_downloads_24h', 0),
+        total_users=stats.get('total_users', 0),
+        user_downloads=user_stats.get('total_downloads', 0),
+        user_success_rate=user_stats.get('success_rate', 0),
+        disk_total=sizeof_fmt(system_stats["disk_total"]),
+        disk_used=sizeof_fmt(system_stats["disk_used"]),
+        disk_free=sizeof_fmt(system_stats["disk_free"])
+    )
+
+
 # Keyboard message handlers
 
-@app.on_message(filters.text & filters.regex(r"^📊 Stats$"))
 @private_use
 async def stats_keyboard_handler(client: Client, message: types.Message):
     chat_id = message.chat.id
-    init_user(chat_id)
-    await client.send_chat_action(chat_id, enums.ChatAction.TYPING)
-    cpu_usage = psutil.cpu_percent()
-    total, used, free, disk = psutil.disk_usage("/")
-    swap = psutil.swap_memory()
-    memory = psutil.virtual_memory()
-    boot_time = psutil.boot_time()
-
-    owner_stats = (
-        "\n\n⌬─────「 Stats 」─────⌬\n\n"
-        f"<b>╭🖥️ **CPU Usage »**</b>  __{cpu_usage}%__\n"
-        f"<b>├💾 **RAM Usage »**</b>  __{memory.percent}%__\n"
-        f"<b>╰🗃️ **DISK Usage »**</b>  __{disk}%__\n\n"
-        f"<b>╭📤Upload:</b> {sizeof_fmt(psutil.net_io_counters().bytes_sent)}\n"
-        f"<b>╰📥Download:</b> {sizeof_fmt(psutil.net_io_counters().bytes_recv)}\n\n\n"
-        f"<b>Memory Total:</b> {sizeof_fmt(memory.total)}\n"
-        f"<b>Memory Free:</b> {sizeof_fmt(memory.available)}\n"
-        f"<b>Memory Used:</b> {sizeof_fmt(memory.used)}\n"
-        f"<b>SWAP Total:</b> {sizeof_fmt(swap.total)} | <b>SWAP Usage:</b> {swap.percent}%\n\n"
-        f"<b>Total Disk Space:</b> {sizeof_fmt(total)}\n"
-        f"<b>Used:</b> {sizeof_fmt(used)} | <b>Free:</b> {sizeof_fmt(free)}\n\n"
-        f"<b>Physical Cores:</b> {psutil.cpu_count(logical=False)}\n"
-        f"<b>Total Cores:</b> {psutil.cpu_count(logical=True)}\n\n"
-        f"<b>🤖Bot Uptime:</b> {timeof_fmt(time.time() - botStartTime)}\n"
-        f"<b>⏲️OS Uptime:</b> {timeof_fmt(time.time() - boot_time)}\n"
-    )
-
-    user_stats = (
-        "\n\n⌬─────「 Stats 」─────⌬\n\n"
-        f"<b>╭🖥️ **CPU Usage »**</b>  __{cpu_usage}%__\n"
-        f"<b>├💾 **RAM Usage »**</b>  __{memory.percent}%__\n"
-        f"<b>╰🗃️ **DISK Usage »**</b>  __{disk}%__\n\n"
-        f"<b>╭📤Upload:</b> {sizeof_fmt(psutil.net_io_counters().bytes_sent)}\n"
-        f"<b>╰📥Download:</b> {sizeof_fmt(psutil.net_io_counters().bytes_recv)}\n\n\n"
-        f"<b>Memory Total:</b> {sizeof_fmt(memory.total)}\n"
-        f"<b>Memory Free:</b> {sizeof_fmt(memory.available)}\n"
-        f"<b>Memory Used:</b> {sizeof_fmt(memory.used)}\n"
-        f"<b>Total Disk Space:</b> {sizeof_fmt(total)}\n"
-        f"<b>Used:</b> {sizeof_fmt(used)} | <b>Free:</b> {sizeof_fmt(free)}\n\n"
-        f"<b>🤖Bot Uptime:</b> {timeof_fmt(time.time() - botStartTime)}\n"
-    )
+    await ensure_user(chat_id)
+    send_typing(client, chat_id)
+    system_stats = await get_system_stats()
+    memory = system_stats["memory"]
+    net_io = system_stats["net_io"]
+    now = time.time()
+    fields = {
+        "cpu_usage": system_stats["cpu_usage"],
+        "ram_percent": memory.percent,
+        "disk_percent": system_stats["disk_percent"],
+        "bytes_sent": sizeof_fmt(net_io.bytes_sent),
+        "bytes_recv": sizeof_fmt(net_io.bytes_recv),
+        "memory_total": sizeof_fmt(memory.total),
+        "memory_free": sizeof_fmt(memory.available),
+        "memory_used": sizeof_fmt(memory.used),
+        "disk_total": sizeof_fmt(system_stats["disk_total"]),
+        "disk_used": sizeof_fmt(system_stats["disk_used"]),
+        "disk_free": sizeof_fmt(system_stats["disk_free"]),
+        "bot_uptime": timeof_fmt(now - botStartTime),
+    }
 
     is_owner = await is_admin(client, message.from_user.id)
-    await message.reply_text(owner_stats if is_owner else user_stats, quote=True)
+    if is_owner:
+        swap = system_stats["swap"]
+        fields.update(
+            swap_total=sizeof_fmt(swap.total),
+            swap_percent=swap.percent,
+            physical_cores=CPU_PHYSICAL_CORES,
+            total_cores=CPU_TOTAL_CORES,
+            os_uptime=timeof_fmt(now - BOOT_TIME),
+        )
+    template = _OWNER_STATS_TEMPLATE if is_owner else _USER_STATS_TEMPLATE
+    await message.reply_text(template.format_map(fields), quote=True)
 
 
-@app.on_message(filters.text & filters.regex(r"^ℹ️ About$"))
 @private_use
 async def about_keyboard_handler(client: Client, message: types.Message):
     chat_id = message.chat.id
-    init_user(chat_id)
-    await client.send_chat_action(chat_id, enums.ChatAction.TYPING)
+    await ensure_user(chat_id)
     await client.send_message(chat_id, BotText.about)
 
 
 
 
-@app.on_message(filters.text & filters.regex(r"^🏓 Ping$"))
 @private_use
 async def ping_keyboard_handler(client: Client, message: types.Message):
     chat_id = message.chat.id
-    init_user(chat_id)
-    await client.send_chat_action(chat_id, enums.ChatAction.TYPING)
+    await ensure_user(chat_id)
 
     async def send_message_and_measure_ping():
-        start_time = int(round(time.time() * 1000))
+        start_time = time.monotonic_ns()
         reply: types.Message | typing.Any = await client.send_message(chat_id, "Starting Ping...")
 
-        end_time = int(round(time.time() * 1000))
-        ping_time = int(round(end_time - start_time))
-        message_sent = True
-        if message_sent:
-            await message.reply_text(f"Ping: {ping_time:.2f} ms", quote=True)
+        ping_time = (time.monotonic_ns() - start_time) // 1_000_000
+        await message.reply_text(f"Ping: {ping_time} ms", quote=True)
         await asyncio.sleep(0.5)
         await client.edit_message_text(chat_id=reply.chat.id, message_id=reply.id, text="Ping Calculation Complete.")
         await asyncio.sleep(1)
         await client.delete_messages(chat_id=reply.chat.id, message_ids=reply.id)
 
     # Run ping measurement in the background
-    asyncio.create_task(send_message_and_measure_ping())
+    run_in_background(send_message_and_measure_ping())
 
 
-@app.on_message(filters.text & filters.regex(r"^📥 Direct Download$"))
 @private_use
 async def direct_download_keyboard_handler(client: Client, message: types.Message):
     chat_id = message.chat.id
-    init_user(chat_id)
-    await set_user_state(chat_id, "direct_download")
+    await ensure_user(chat_id)
+    set_user_state(chat_id, "direct_download")
     await client.send_message(
         chat_id,
         "📥 **Direct Download Mode**\n\nSend me a direct link to download the file directly using aria2/requests.\n\n_Send any other message to cancel._",
-        reply_markup=create_back_keyboard()
+        reply_markup=BACK_KEYBOARD
     )
 
 
-@app.on_message(filters.text & filters.regex(r"^🔗 Special Download$"))
 @private_use
 async def special_download_keyboard_handler(client: Client, message: types.Message):
     chat_id = message.chat.id
-    init_user(chat_id)
-    await set_user_state(chat_id, "special_download")
+    await ensure_user(chat_id)
+    set_user_state(chat_id, "special_download")
     await client.send_message(
         chat_id,
         "🔗 **Special Download Mode**\n\nSend me a link for special download processing (Instagram, Pixeldrain, Krakenfiles).\n\n_Send any other message to cancel._",
-        reply_markup=create_back_keyboard()
+        reply_markup=BACK_KEYBOARD
     )
 
 
+# Keyboard button texts routed by one exact-match lookup instead of one filter per button
+_BUTTON_DISPATCH = {
+    "📊 Stats": stats_keyboard_handler,
+    "ℹ️ About": about_keyboard_handler,
+    "🏓 Ping": ping_keyboard_handler,
+    "📥 Direct Download": direct_download_keyboard_handler,
+    "🔗 Special Download": special_download_keyboard_handler,
+}
+keyboard_button = filters.create(lambda _, __, message: message.text in _BUTTON_DISPATCH)
+
+
+@app.on_message(filters.text & keyboard_button)
+async def keyboard_button_handler(client: Client, message: types.Message):
+    return await _BUTTON_DISPATCH[message.text](client, message)
+
+
+_CHANNEL_PREFIX = "https://www.youtube.com/channel/"
+_FORMAT_SELECTION_TEMPLATE = (
+    "🎬 **YouTube Format Selection**\n\n"
+    "Choose your preferred format and quality:\n"
+    "• 📽️ Video formats include both video and audio\n"
+    "• 🎵 Audio formats are audio-only\n"
+    "• File sizes are estimates\n\n"
+    "**URL:** `{url}...`"
+)
+_URL_PREFIXES = ("http://", "https://")
+
+# One scan picks the platform: YouTube by host (like is_youtube_url), the
+# special downloaders by substring anywhere in the URL
+_PLATFORM_RE = re.compile(
+    r"^https?://(?:www\.|m\.|music\.)?(youtube\.com|youtu\.be)(?=[/?#:]|$)|(instagram|pixeldrain|krakenfiles)",
+    re.IGNORECASE,
+)
+
+# Platforms routed to the special downloader: key -> (display name, received message)
+_SPECIAL_PLATFORMS = {
+    "instagram": ("Instagram", "📱 Instagram download request received."),
+    "pixeldrain": ("Pixeldrain", "☁️ Pixeldrain download request received."),
+    "krakenfiles": ("Krakenfiles", "🗂️ Krakenfiles download request received."),
+}
+
+# URLs ending in one of these extensions are fetched as direct downloads;
+# matched against the text after the last dot (.tar.gz ends in gz)
+_DIRECT_DOWNLOAD_EXTENSIONS = frozenset({
+    'zip', 'rar', '7z', 'tar', 'gz', 'bz2', 'xz',
+    'pdf', 'doc', 'docx', 'xlsx', 'ppt', 'pptx',
+    'exe', 'msi', 'deb', 'rpm', 'dmg', 'pkg',
+    'iso', 'img', 'bin',
+})
+
+
+# Activity and failure records nobody waits on are written by one background
+# consumer, so handlers don't block on the DB; when the queue is full the
+# oldest record is dropped
+DB_LOG_QUEUE_SIZE = 10000
+db_log_queue: asyncio.Queue = asyncio.Queue(maxsize=DB_LOG_QUEUE_SIZE)
+_db_log_consumers: list[asyncio.Task] = []
+
+
+async def db_log_consumer(queue: asyncio.Queue):
+    """Write queued DB log records in a worker thread, one at a time"""
+    while True:
+        fn, args, kwargs = await queue.get()
+        try:
+            await asyncio.to_thread(fn, *args, **kwargs)
+        except Exception as e:
+            logging.error("Background %s failed: %s", fn.__name__, e)
+        finally:
+            queue.task_done()
+
+
+def queue_db_log(fn, *args, **kwargs):
+    """Schedule fn(*args, **kwargs) on the DB log consumer and return immediately"""
+    if not _db_log_consumers:
+        _db_log_consumers.append(asyncio.create_task(db_log_consumer(db_log_queue)))
+    if db_log_queue.full():
+        db_log_queue.get_nowait()
+        db_log_queue.task_done()
+    db_log_queue.put_nowait((fn, args, kwargs))
+
+
+# Downloads run yt-dlp/aria2/ffmpeg; a fixed pool of workers drains a bounded
+# queue so a burst of requests can't exhaust CPU, disk or bandwidth, and jobs
+# start in the order they arrived
+DOWNLOAD_QUEUE_SIZE = 1000
+download_queue: asyncio.Queue = asyncio.Queue(maxsize=DOWNLOAD_QUEUE_SIZE)
+_download_workers: list[asyncio.Task] = []
+
+
+async def download_worker(queue: asyncio.Queue):
+    """Run queued download jobs one at a time; each job reports its own outcome to the user"""
+    while True:
+        job, args = await queue.get()
+        try:
+            await job(*args)
+        except asyncio.CancelledError:
+            # Only a cancel aimed at this worker stops it; one raised from inside
+            # a job is just a failed download and must not shrink the pool
+            if asyncio.current_task().cancelling():
+                raise
+            logging.error("Download job %s was cancelled", job.__name__, exc_info=True)
+        except Exception:
+            logging.error("Download job %s failed", job.__name__, exc_info=True)
+        finally:
+            queue.task_done()
+
+
+def start_download_workers():
+    """Spawn the download worker pool on the running loop (no-op if already started)"""
+    if not _download_workers:
+        _download_workers.extend(
+            asyncio.create_task(download_worker(download_queue))
+            for _ in range(MAX_CONCURRENT_DOWNLOADS)
+        )
+
+
+async def enqueue_download(job, *args):
+    """Queue job(*args) for the download workers and return without waiting for it.
+
+    Handlers must not wait for the download itself: that would hold a Pyrogram
+    handler worker for the whole download and stall every other update.
+    """
+    start_download_workers()
+    await download_queue.put((job, args))
+
+
+async def report_download_failure(client: Client, message: types.Message, download_id, e: Exception):
+    """Tell the user why a download request failed and record it in the stats"""
+    clear_user_state(message.from_user.id)  # Clear state on error
+    if isinstance(e, pyrogram.errors.Flood):
+        await message.reply_text(
+            f"Flood wait! Please wait {e.value} seconds...\nYour job will be done soon. Just wait!", quote=True
+        )
+        # Notify all admins about flood wait. No sleep here: this may run on a
+        # download worker, and parking it for the wait would stall the queue
+        notice = f"Flood wait! 🙁 {e.value} seconds...."
+        await asyncio.gather(
+            *(client.send_message(admin_id, notice) for admin_id in get_admin_set()),
+            return_exceptions=True,  # Skip admins we can't send to
+        )
+        return
+    
+    # Log download failure for stats
+    if download_id:
+        queue_db_log(log_download_completion, download_id, False, error_message=str(e))
+    if isinstance(e, ValueError):
+        await message.reply_text(e.__str__(), quote=True)
+    else:
+        logging.error("Download failed", exc_info=e)
+        await message.reply_text(f"❌ Download failed: {e}", quote=True)
+
+
+async def mode_download_job(entrance, client: Client, message: types.Message, bot_msg: types.Message, url: str, download_id):
+    """Worker job for the direct/special download modes"""
+    try:
+        await entrance(client, bot_msg, url, download_id)
+    except ValueError as e:
+        await message.reply_text(e.__str__(), quote=True)
+        await bot_msg.delete()
+    except Exception as e:
+        await report_download_failure(client, message, download_id, e)
+
+
+async def detected_download_job(entrance, client: Client, message: types.Message, bot_msg: types.Message, url: str, download_id, label: str):
+    """Worker job for URLs routed by platform or file extension"""
+    try:
+        await entrance(client, bot_msg, url, download_id)
+    except Exception as e:
+        logging.error("%s download failed: %s", label, e)
+        await message.reply_text(f"❌ {label} download failed: {e}", quote=True)
+        await bot_msg.delete()
+
+
+async def default_download_job(client: Client, message: types.Message, bot_msg: types.Message, url: str, download_id):
+    """Worker job for the regular yt-dlp download"""
+    try:
+        await youtube_entrance(client, bot_msg, url, None, download_id)
+    except Exception as e:
+        await report_download_failure(client, message, download_id, e)
+
+
 def check_link(url: str):
-    ytdl = yt_dlp.YoutubeDL()
-    if re.findall(r"^https://www\.youtube\.com/channel/", url) or "list" in url:
+    if url.startswith(_CHANNEL_PREFIX) or "list" in url:
         # TODO maybe using ytdl.extract_info
         raise ValueError("Playlist or channel download are not supported at this moment.")
 
-    if not M3U8_SUPPORT and (re.findall(r"m3u8|\.m3u8|\.m3u$", url.lower())):
-        return "m3u8 links are disabled."
+    if not M3U8_SUPPORT:
+        url_lower = url.lower()
+        if "m3u8" in url_lower or url_lower.endswith(".m3u"):
+            raise ValueError("m3u8 links are disabled.")
 
 
-@app.on_message(filters.incoming & filters.text & ~filters.regex(r"^(⚙️|📊|ℹ️|❓|🏓|📥|🔗|🔧|/)"), group=1)
+# Texts starting with a keyboard emoji or "/" are buttons/commands, not links.
+# "⚙️" and "ℹ️" carry a variation selector, so check the 1- and 2-char prefixes
+_NON_URL_PREFIXES = frozenset({"⚙️", "📊", "ℹ️", "❓", "🏓", "📥", "🔗", "🔧", "/"})
+url_text = filters.create(
+    lambda _, __, message: message.text[:1] not in _NON_URL_PREFIXES
+    and message.text[:2] not in _NON_URL_PREFIXES
+)
+
+
+@app.on_message(filters.private & filters.incoming & filters.text & url_text, group=1)
 @private_use
 @download_error_handler
 async def download_handler(client: Client, message: types.Message):
     chat_id = message.from_user.id
-    init_user(chat_id)
+    await ensure_user(chat_id)
     await client.send_chat_action(chat_id, enums.ChatAction.TYPING)
     url = message.text
+    download_id = None
     logging.info("start %s", url)
 
     # Check if user is admin and has an active admin session
@@ -313,13 +642,13 @@ async def download_handler(client: Client, message: types.Message):
         return
 
     # Check user state for special download modes
-    user_state = await get_user_state(chat_id)
+    user_state = get_user_state(chat_id)
     
     try:
         # Validate URL format
-        if not re.findall(r"^https?://", url.lower()):
+        if not url[:8].lower().startswith(_URL_PREFIXES):
             if user_state:
-                await clear_user_state(chat_id)
+                clear_user_state(chat_id)
                 await message.reply_text("❌ **Mode Cancelled**\n\nInvalid URL format. Please use a valid HTTP/HTTPS URL.", quote=True)
             else:
                 await message.reply_text("❌ **Invalid URL**\n\nPlease send a valid HTTP/HTTPS URL.", quote=True)
@@ -329,38 +658,31 @@ async def download_handler(client: Client, message: types.Message):
         
         # Handle different download modes based on user state
         if user_state == "direct_download":
-            await clear_user_state(chat_id)
+            clear_user_state(chat_id)
             logging.info("Direct download using aria2/requests start %s", url)
             bot_msg = await message.reply_text("📥 Direct download request received.", quote=True)
-            try:
-                # Create download_id for direct downloads
-                download_id = log_download_attempt(chat_id, url, "direct")
-                await direct_entrance(client, bot_msg, url, download_id)
-            except ValueError as e:
-                await message.reply_text(e.__str__(), quote=True)
-                await bot_msg.delete()
+            # Create download_id for direct downloads
+            download_id = await asyncio.to_thread(log_download_attempt, chat_id, url, "direct")
+            await enqueue_download(mode_download_job, direct_entrance, client, message, bot_msg, url, download_id)
             return
             
         elif user_state == "special_download":
-            await clear_user_state(chat_id)
+            clear_user_state(chat_id)
             logging.info("Special download start %s", url)
             bot_msg = await message.reply_text("🔗 Special download request received.", quote=True)
-            try:
-                # Create download_id for special downloads
-                download_id = log_download_attempt(chat_id, url, "special")
-                await special_download_entrance(client, bot_msg, url, download_id)
-            except ValueError as e:
-                await message.reply_text(e.__str__(), quote=True)
-                await bot_msg.delete()
+            # Create download_id for special downloads
+            download_id = await asyncio.to_thread(log_download_attempt, chat_id, url, "special")
+            await enqueue_download(mode_download_job, special_download_entrance, client, message, bot_msg, url, download_id)
             return
         
         # Regular download mode - check if it's a YouTube URL for dynamic format selection
         processing_msg = None
-        if is_youtube_url(url):
+        platform_match = _PLATFORM_RE.search(url)
+        if platform_match and platform_match.group(1):
             # Log download attempt
             platform = "youtube"
-            download_id = log_download_attempt(chat_id, url, platform)
-            log_user_activity(chat_id, 'download', {'platform': platform, 'url': url, 'download_id': download_id})
+            download_id = await asyncio.to_thread(log_download_attempt, chat_id, url, platform)
+            queue_db_log(log_user_activity, chat_id, 'download', {'platform': platform, 'url': url, 'download_id': download_id})
             
             # Send immediate feedback
             processing_msg = await message.reply_text(
@@ -372,26 +694,21 @@ async def download_handler(client: Client, message: types.Message):
             # Extract available formats
             try:
                 # Clean up any existing session to prevent URL corruption
-                delete_youtube_format_session(chat_id)
+                await asyncio.to_thread(delete_youtube_format_session, chat_id)
                 
                 # Also clear any user states that might interfere
-                await clear_user_state(chat_id)
+                clear_user_state(chat_id)
                 
-                formats = extract_youtube_formats(url)
+                formats = await asyncio.to_thread(extract_youtube_formats, url)
                 if formats and (formats.get('video_formats') or formats.get('audio_formats')):
                     # Create a session for this user and URL
-                    create_youtube_format_session(chat_id, url, formats)
+                    await asyncio.to_thread(create_youtube_format_session, chat_id, url, formats)
                     logging.info(f"Created new format session for user {chat_id} with URL: {url}")
                     
                     # Send format selection keyboard
                     format_keyboard = create_youtube_format_keyboard(formats)
                     await processing_msg.edit_text(
-                        "🎬 **YouTube Format Selection**\n\n"
-                        "Choose your preferred format and quality:\n"
-                        "• 📽️ Video formats include both video and audio\n"
-                        "• 🎵 Audio formats are audio-only\n"
-                        "• File sizes are estimates\n\n"
-                        f"**URL:** `{url[:50]}...`",
+                        _FORMAT_SELECTION_TEMPLATE.format(url=url[:50]),
                         reply_markup=format_keyboard
                     )
                     return
@@ -405,80 +722,32 @@ async def download_handler(client: Client, message: types.Message):
                 await processing_msg.edit_text("🎬 **Processing YouTube download...**\n\n⏳ Starting download with default settings...")
         else:
             # Log download attempt for non-YouTube platforms
-            platform = "other"
-            if "instagram" in url.lower():
-                platform = "instagram"
-                # Route Instagram URLs to special download handler
-                download_id = log_download_attempt(chat_id, url, platform)
-                log_user_activity(chat_id, 'download', {'platform': platform, 'url': url, 'download_id': download_id})
-                
-                bot_msg = await message.reply_text("📱 Instagram download request received.", quote=True)
-                try:
-                    await special_download_entrance(client, bot_msg, url, download_id)
-                    return
-                except Exception as e:
-                    logging.error(f"Instagram download failed: {e}")
-                    await message.reply_text(f"❌ Instagram download failed: {e}", quote=True)
-                    await bot_msg.delete()
-                    return
-                    
-            elif "pixeldrain" in url.lower():
-                platform = "pixeldrain"
-                # Route to special download handler
-                download_id = log_download_attempt(chat_id, url, platform)
-                log_user_activity(chat_id, 'download', {'platform': platform, 'url': url, 'download_id': download_id})
-                
-                bot_msg = await message.reply_text("☁️ Pixeldrain download request received.", quote=True)
-                try:
-                    await special_download_entrance(client, bot_msg, url, download_id)
-                    return
-                except Exception as e:
-                    logging.error(f"Pixeldrain download failed: {e}")
-                    await message.reply_text(f"❌ Pixeldrain download failed: {e}", quote=True)
-                    await bot_msg.delete()
-                    return
-                    
-            elif "krakenfiles" in url.lower():
-                platform = "krakenfiles"
-                # Route to special download handler
-                download_id = log_download_attempt(chat_id, url, platform)
-                log_user_activity(chat_id, 'download', {'platform': platform, 'url': url, 'download_id': download_id})
+            platform = platform_match.group(2).lower() if platform_match else "other"
+            if platform != "other":
+                # Route Instagram, Pixeldrain and Krakenfiles URLs to special download handler
+                platform_name, received_text = _SPECIAL_PLATFORMS[platform]
+                download_id = await asyncio.to_thread(log_download_attempt, chat_id, url, platform)
+                queue_db_log(log_user_activity, chat_id, 'download', {'platform': platform, 'url': url, 'download_id': download_id})
                 
-                bot_msg = await message.reply_text("🗂️ Krakenfiles download request received.", quote=True)
-                try:
-                    await special_download_entrance(client, bot_msg, url, download_id)
-                    return
-                except Exception as e:
-                    logging.error(f"Krakenfiles download failed: {e}")
-                    await message.reply_text(f"❌ Krakenfiles download failed: {e}", quote=True)
-                    await bot_msg.delete()
-                    return
+                bot_msg = await message.reply_text(received_text, quote=True)
+                await enqueue_download(
+                    detected_download_job, special_download_entrance, client, message, bot_msg, url, download_id, platform_name
+                )
+                return
             
             # For other platforms, log as generic and determine best download method
-            download_id = log_download_attempt(chat_id, url, platform)
-            log_user_activity(chat_id, 'download', {'platform': platform, 'url': url, 'download_id': download_id})
+            download_id = await asyncio.to_thread(log_download_attempt, chat_id, url, platform)
+            queue_db_log(log_user_activity, chat_id, 'download', {'platform': platform, 'url': url, 'download_id': download_id})
             
             # Auto-detect if this should be a direct download based on file extension
-            direct_download_extensions = {'.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', '.xz', 
-                                        '.pdf', '.doc', '.docx', '.xlsx', '.ppt', '.pptx',
-                                        '.exe', '.msi', '.deb', '.rpm', '.dmg', '.pkg',
-                                        '.iso', '.img', '.bin'}
-            
-            # Check if URL ends with a direct download extension
-            url_lower = url.lower()
-            is_direct_download = any(url_lower.endswith(ext) for ext in direct_download_extensions)
+            dot = url.rfind('.')
+            is_direct_download = dot != -1 and url[dot + 1:].lower() in _DIRECT_DOWNLOAD_EXTENSIONS
             
             if is_direct_download:
                 logging.info(f"Auto-detected direct download for URL: {url}")
                 bot_msg = await message.reply_text("📥 Auto-detected direct download. Processing...", quote=True)
-                try:
-                    await direct_entrance(client, bot_msg, url, download_id)
-                    return
-                except Exception as e:
-                    logging.error(f"Direct download failed: {e}")
-                    await message.reply_text(f"❌ Direct download failed: {e}", quote=True)
-                    await bot_msg.delete()
-                    return
+                await enqueue_download(detected_download_job, direct_entrance, client, message, bot_msg, url, download_id, "Direct")
+                return
         
         # Regular download for non-YouTube URLs or YouTube fallback
         if processing_msg:
@@ -489,119 +758,78 @@ async def download_handler(client: Client, message: types.Message):
             bot_msg: types.Message | Any = await message.reply_text("Task received.", quote=True)
         
         await client.send_chat_action(chat_id, enums.ChatAction.UPLOAD_VIDEO)
-        await youtube_entrance(client, bot_msg, url, None, download_id)
+        await enqueue_download(default_download_job, client, message, bot_msg, url, download_id)
         
-    except pyrogram.errors.Flood as e:
-        await clear_user_state(chat_id)  # Clear state on flood
-        f = BytesIO()
-        f.write(str(e).encode())
-        f.write(b"Your job will be done soon. Just wait!")
-        f.name = "Please wait.txt"
-        f.seek(0)  # Reset pointer to beginning of file
-        await message.reply_document(f, caption=f"Flood wait! Please wait {e} seconds...", quote=True)
-        f.close()
-        # Notify all admins about flood wait
-        admin_list = get_admin_list()
-        for admin_id in admin_list:
-            try:
-                await client.send_message(admin_id, f"Flood wait! 🙁 {e} seconds....")
-            except Exception:
-                pass  # Skip if can't send to this admin
-        await asyncio.sleep(e.value)
-    except ValueError as e:
-        await clear_user_state(chat_id)  # Clear state on error
-        # Log download failure for stats
-        if download_id:
-            try:
-                log_download_completion(download_id, False, error_message=str(e))
-                logging.info(f"Logged failed download completion for download_id: {download_id}")
-            except Exception as log_error:
-                logging.error(f"Failed to log download failure: {log_error}")
-        await message.reply_text(e.__str__(), quote=True)
     except Exception as e:
-        await clear_user_state(chat_id)  # Clear state on error
-        # Log download failure for stats
-        if download_id:
-            try:
-                log_download_completion(download_id, False, error_message=str(e))
-                logging.info(f"Logged failed download completion for download_id: {download_id}")
-            except Exception as log_error:
-                logging.error(f"Failed to log download failure: {log_error}")
-        logging.error("Download failed", exc_info=True)
-        await message.reply_text(f"❌ Download failed: {e}", quote=True)
+        await report_download_failure(client, message, download_id, e)
 
 
-# Thread-safe state management with expiry
+# Per-user state management with expiry (event loop only)
 class UserStateManager:
-    """Thread-safe user state manager with automatic expiry"""
+    """User state manager with automatic expiry and a size bound.
+
+    Only used from the event loop and no method awaits, so no lock is needed.
+    """
     
-    def __init__(self, expiry_seconds: int = 3600):  # 1 hour default expiry
-        self._states = {}  # {user_id: {'state': state, 'timestamp': timestamp}}
-        self._lock = asyncio.Lock()
+    def __init__(self, expiry_seconds: int = 3600, max_states: int = 10000):  # 1 hour default expiry
+        # Parallel maps: user_id -> state, user_id -> monotonic set time (least recently set first)
+        self._state: dict[int, str] = {}
+        self._ts: OrderedDict[int, float] = OrderedDict()
         self._expiry_seconds = expiry_seconds
+        self._max_states = max_states
     
-    async def set_user_state(self, user_id: int, state: str) -> None:
+    def set_user_state(self, user_id: int, state: str) -> None:
         """Set user state with timestamp for expiry tracking"""
-        async with self._lock:
-            self._states[user_id] = {
-                'state': state,
-                'timestamp': time.time()
-            }
-            logging.debug(f"Set state '{state}' for user {user_id}")
+        self._state[user_id] = state
+        self._ts[user_id] = time.monotonic()
+        self._ts.move_to_end(user_id)
+        
+        # Drop the oldest abandoned modes once the bound is reached
+        while len(self._ts) > self._max_states:
+            oldest, _ = self._ts.popitem(last=False)
+            del self._state[oldest]
+        logging.debug("Set state %r for user %s", state, user_id)
     
-    async def get_user_state(self, user_id: int) -> str | None:
+    def get_user_state(self, user_id: int) -> str | None:
         """Get user state, automatically removing expired states"""
-        async with self._lock:
-            if user_id not in self._states:
-                return None
-            
-            state_data = self._states[user_id]
-            current_time = time.time()
-            
-            # Check if state has expired
-            if current_time - state_data['timestamp'] > self._expiry_seconds:
-                logging.debug(f"State expired for user {user_id}, removing")
-                del self._states[user_id]
-                return None
-            
-            return state_data['state']
+        state = self._state.get(user_id)
+        if state is None:
+            return None
+        
+        # Check if state has expired
+        if time.monotonic() - self._ts[user_id] > self._expiry_seconds:
+            logging.debug("State expired for user %s, removing", user_id)
+            del self._state[user_id], self._ts[user_id]
+            return None
+        
+        return state
     
-    async def clear_user_state(self, user_id: int) -> None:
+    def clear_user_state(self, user_id: int) -> None:
         """Clear user state"""
-        async with self._lock:
-            if user_id in self._states:
-                logging.debug(f"Cleared state for user {user_id}")
-                del self._states[user_id]
+        if self._state.pop(user_id, None) is not None:
+            logging.debug("Cleared state for user %s", user_id)
+            del self._ts[user_id]
     
-    async def cleanup_expired_states(self) -> int:
+    def cleanup_expired_states(self) -> int:
         """Clean up all expired states, returns number of states removed"""
-        async with self._lock:
-            current_time = time.time()
-            expired_users = []
-            
-            for user_id, state_data in self._states.items():
-                if current_time - state_data['timestamp'] > self._expiry_seconds:
-                    expired_users.append(user_id)
-            
-            for user_id in expired_users:
-                del self._states[user_id]
-            
-            if expired_users:
-                logging.debug(f"Cleaned up {len(expired_users)} expired states")
-            
-            return len(expired_users)
+        current_time = time.monotonic()
+        expired_users = [
+            user_id for user_id, timestamp in self._ts.items()
+            if current_time - timestamp > self._expiry_seconds
+        ]
+        
+        for user_id in expired_users:
+            del self._state[user_id], self._ts[user_id]
+        
+        if expired_users:
+            logging.debug("Cleaned up %d expired states", len(expired_users))
+        
+        return len(expired_users)
     
-    async def get_active_states_count(self) -> int:
+    def get_active_states_count(self) -> int:
         """Get count of active (non-expired) states"""
-        async with self._lock:
-            current_time = time.time()
-            active_count = 0
-            
-            for state_data in self._states.values():
-                if current_time - state_data['timestamp'] <= self._expiry_seconds:
-                    active_count += 1
-            
-            return active_count
+        current_time = time.monotonic()
+        return sum(1 for timestamp in self._ts.values() if current_time - timestamp <= self._expiry_seconds)
 
 
 # Global instance of the user state manager
@@ -609,48 +837,46 @@ user_state_manager = UserStateManager(expiry_seconds=1800)  # 30 minutes expiry
 
 
 # Legacy wrapper functions for backward compatibility (to be replaced gradually)
-async def set_user_state(user_id, state):
+def set_user_state(user_id, state):
     """Legacy wrapper - use user_state_manager.set_user_state() directly"""
-    await user_state_manager.set_user_state(user_id, state)
+    user_state_manager.set_user_state(user_id, state)
 
-async def get_user_state(user_id):
+def get_user_state(user_id):
     """Legacy wrapper - use user_state_manager.get_user_state() directly"""
-    return await user_state_manager.get_user_state(user_id)
+    return user_state_manager.get_user_state(user_id)
 
-async def clear_user_state(user_id):
+def clear_user_state(user_id):
     """Legacy wrapper - use user_state_manager.clear_user_state() directly"""
-    await user_state_manager.clear_user_state(user_id)
+    user_state_manager.clear_user_state(user_id)
 
 
-@app.on_callback_query(filters.regex(r"^back_to_"))
 @private_use_callback
 async def back_navigation_handler(client: Client, callback_query: types.CallbackQuery):
     chat_id = callback_query.message.chat.id
     data = callback_query.data
     
     # Clear any user state when going back to main
-    await clear_user_state(chat_id)
+    clear_user_state(chat_id)
     
     if data == "back_to_main":
         # Show main menu
-        admin_status = await is_admin(client, callback_query.from_user.id)
-        keyboard = create_admin_keyboard() if admin_status else create_main_keyboard()
+        admin_status = current_user_is_admin(callback_query.from_user.id)
+        keyboard = ADMIN_KEYBOARD if admin_status else MAIN_KEYBOARD
         await callback_query.edit_message_text(
-            "🏠 **Main Menu**\n\nChoose an option:",
+            MAIN_MENU_TEXT,
             reply_markup=keyboard
         )
     
     await callback_query.answer()
 
 
-@app.on_callback_query(filters.regex(r"^yt_format_"))
 @private_use_callback
 async def youtube_format_callback_handler(client: Client, callback_query: types.CallbackQuery):
     chat_id = callback_query.message.chat.id
-    format_id = callback_query.data.replace("yt_format_", "")
+    format_id = callback_query.data[len(_YT_FORMAT_PREFIX):]
     
     # Get the session data
-    session = get_youtube_format_session(chat_id)
+    session = await asyncio.to_thread(get_youtube_format_session, chat_id)
     if not session:
         await callback_query.answer("❌ Session expired. Please send the URL again.")
         return
@@ -665,39 +891,42 @@ async def youtube_format_callback_handler(client: Client, callback_query: types.
         # Create a proper bot message for the download process
         bot_msg = await callback_query.message.reply_text("⏳ Preparing download...", quote=False)
         
+        await enqueue_download(session_download_job, client, callback_query, bot_msg, chat_id, session)
+    except Exception as e:
+        await session_download_failed(callback_query, chat_id, session, e)
+
+    await callback_query.answer()
+
+
+async def session_download_failed(callback_query: types.CallbackQuery, chat_id: int, session: dict, e: Exception):
+    """Report a failed format-session download and drop the session"""
+    logging.error("YouTube download failed", exc_info=e)
+    # Log download failure for stats
+    download_id = session.get('download_id')
+    if download_id:
+        queue_db_log(log_download_completion, download_id, False, error_message=str(e))
+    await callback_query.edit_message_text(f"❌ **Download Failed**\n\n{str(e)}")
+    await asyncio.to_thread(delete_youtube_format_session, chat_id)
+
+
+async def session_download_job(client: Client, callback_query: types.CallbackQuery, bot_msg: types.Message, chat_id: int, session: dict):
+    """Worker job for a download started from a format session"""
+    try:
         # Use the youtube_entrance with specific format and download_id from session
-        download_id = session.get('download_id')
-        if download_id:
-            await youtube_entrance(client, bot_msg, session['url'], download_id=download_id)
-        else:
-            await youtube_entrance(client, bot_msg, session['url'])
-        
+        await youtube_entrance(client, bot_msg, session['url'], download_id=session.get('download_id'))
+
         # Clean up the session
-        delete_youtube_format_session(chat_id)
-        
+        await asyncio.to_thread(delete_youtube_format_session, chat_id)
     except Exception as e:
-        logging.error("YouTube download failed", exc_info=True)
-        # Log download failure for stats
-        download_id = session.get('download_id') if session else None
-        if download_id:
-            try:
-                log_download_completion(download_id, False, error_message=str(e))
-                logging.info(f"Logged failed download completion for download_id: {download_id}")
-            except Exception as log_error:
-                logging.error(f"Failed to log download failure: {log_error}")
-        await callback_query.edit_message_text(f"❌ **Download Failed**\n\n{str(e)}")
-        delete_youtube_format_session(chat_id)
-    
-    await callback_query.answer()
+        await session_download_failed(callback_query, chat_id, session, e)
 
 
-@app.on_callback_query(filters.regex(r"^cancel_format_selection$"))
 @private_use_callback
 async def cancel_format_selection_handler(client: Client, callback_query: types.CallbackQuery):
     chat_id = callback_query.message.chat.id
     
     # Clean up the session
-    delete_youtube_format_session(chat_id)
+    await asyncio.to_thread(delete_youtube_format_session, chat_id)
     
     await callback_query.edit_message_text(
         "❌ **Format Selection Cancelled**\n\nYou can send another URL to try again."
@@ -706,16 +935,66 @@ async def cancel_format_selection_handler(client: Client, callback_query: types.
 
 
 # YouTube Format Selection Handlers
-@app.on_callback_query(filters.regex(r"^ytfmt_"))
+async def format_download_job(client: Client, bot_msg: types.Message, chat_id: int, url: str, format_string: str, label: str):
+    """Worker job for a format picked from the selection keyboard"""
+    try:
+        await youtube_entrance(client, bot_msg, url, format_string)
+    except Exception as e:
+        logging.error("YouTube %s download failed: %s", label, e)
+        await bot_msg.edit_text(f"❌ **Download Failed**\n\n{str(e)}")
+    await asyncio.to_thread(delete_youtube_format_session, chat_id)
+
+
+async def download_video_format(client: Client, callback_query: types.CallbackQuery, chat_id: int, url: str, format_id: str):
+    """Download a selected video format, merged with the best audio when possible"""
+    await callback_query.edit_message_text(f"🎬 **Downloading video format {format_id}...**")
+    
+    logging.info(f"User {chat_id} selected video format {format_id}, session URL: {url}")
+    
+    # Create a proper bot message for the download process
+    bot_msg = await callback_query.message.reply_text(f"⏳ Preparing format {format_id} download...", quote=False)
+    
+    # Build proper format string for video - try to get video+audio if possible
+    # If it's a video-only format, combine it with best audio
+    format_string = f"{format_id}+bestaudio/bestvideo[format_id={format_id}]+bestaudio/{format_id}"
+    await enqueue_download(format_download_job, client, bot_msg, chat_id, url, format_string, f"video format {format_id}")
+
+
+async def download_audio_format(client: Client, callback_query: types.CallbackQuery, chat_id: int, url: str, format_id: str):
+    """Download a selected audio-only format"""
+    await callback_query.edit_message_text(f"🎵 **Downloading audio format {format_id}...**")
+    
+    logging.info(f"User {chat_id} selected audio format {format_id}, session URL: {url}")
+    
+    # Create a proper bot message for the download process
+    bot_msg = await callback_query.message.reply_text(f"⏳ Preparing audio format {format_id} download...", quote=False)
+    
+    # For audio, just use the format ID directly since it's audio-only
+    await enqueue_download(format_download_job, client, bot_msg, chat_id, url, format_id, f"audio format {format_id}")
+
+
+# Format callback prefix -> downloader; the format ID is the rest of the data
+_YTFMT_DOWNLOADS = (
+    (_YTFMT_VIDEO_PREFIX, download_video_format),
+    (_YTFMT_AUDIO_PREFIX, download_audio_format),
+)
+_YTFMT_DIVIDERS = frozenset({"ytfmt_divider", "ytfmt_audio_divider"})
+
+
 @private_use_callback
 async def youtube_format_selection_handler(client: Client, callback_query: types.CallbackQuery):
     """Handle YouTube format selection callbacks"""
     chat_id = callback_query.message.chat.id
     data = callback_query.data
     
+    if data in _YTFMT_DIVIDERS:
+        # Ignore divider clicks; no session needed
+        await callback_query.answer("This is just a divider", show_alert=False)
+        return
+    
     try:
         # Get user's YouTube format session
-        formats_session = get_youtube_format_session(chat_id)
+        formats_session = await asyncio.to_thread(get_youtube_format_session, chat_id)
         logging.info(f"[CALLBACK] User {chat_id}: Retrieved session data: {formats_session}")
         if not formats_session:
             # Session expired or doesn't exist - clean up any stale UI and inform user
@@ -731,7 +1010,7 @@ async def youtube_format_selection_handler(client: Client, callback_query: types
         # Validate session has URL
         if 'url' not in formats_session or not formats_session['url']:
             logging.warning(f"Invalid session for user {chat_id}: missing URL")
-            delete_youtube_format_session(chat_id)
+            await asyncio.to_thread(delete_youtube_format_session, chat_id)
             await callback_query.edit_message_text(
                 "❌ **Invalid Session**\n\n"
                 "Session data is corrupted. Please send the YouTube URL again.",
@@ -743,58 +1022,16 @@ async def youtube_format_selection_handler(client: Client, callback_query: types
         await callback_query.answer("Processing your selection...")
         
         if data == "ytfmt_cancel":
-            delete_youtube_format_session(chat_id)
+            await asyncio.to_thread(delete_youtube_format_session, chat_id)
             await callback_query.edit_message_text(
                 "❌ **Format Selection Cancelled**\n\nYou can send another URL to try again."
             )
             return
             
-        elif data.startswith("ytfmt_v_"):
-            # Video format selected
-            format_id = data.replace("ytfmt_v_", "")
-            await callback_query.edit_message_text(f"🎬 **Downloading video format {format_id}...**")
-            
-            logging.info(f"User {chat_id} selected video format {format_id}, session URL: {formats_session['url']}")
-            
-            # Create a proper bot message for the download process
-            bot_msg = await callback_query.message.reply_text(f"⏳ Preparing format {format_id} download...", quote=False)
-            
-            try:
-                # Build proper format string for video - try to get video+audio if possible
-                # If it's a video-only format, combine it with best audio
-                format_string = f"{format_id}+bestaudio/bestvideo[format_id={format_id}]+bestaudio/{format_id}"
-                await youtube_entrance(client, bot_msg, formats_session['url'], format_string)
-                delete_youtube_format_session(chat_id)
-            except Exception as e:
-                logging.error(f"YouTube video format {format_id} download failed: {e}")
-                await bot_msg.edit_text(f"❌ **Download Failed**\n\n{str(e)}")
-                delete_youtube_format_session(chat_id)
-            return
-            
-        elif data.startswith("ytfmt_a_"):
-            # Audio format selected
-            format_id = data.replace("ytfmt_a_", "")
-            await callback_query.edit_message_text(f"🎵 **Downloading audio format {format_id}...**")
-            
-            logging.info(f"User {chat_id} selected audio format {format_id}, session URL: {formats_session['url']}")
-            
-            # Create a proper bot message for the download process
-            bot_msg = await callback_query.message.reply_text(f"⏳ Preparing audio format {format_id} download...", quote=False)
-            
-            try:
-                # For audio, just use the format ID directly since it's audio-only
-                await youtube_entrance(client, bot_msg, formats_session['url'], format_id)
-                delete_youtube_format_session(chat_id)
-            except Exception as e:
-                logging.error(f"YouTube audio format {format_id} download failed: {e}")
-                await bot_msg.edit_text(f"❌ **Download Failed**\n\n{str(e)}")
-                delete_youtube_format_session(chat_id)
-            return
-            
-        elif data in ["ytfmt_divider", "ytfmt_audio_divider"]:
-            # Ignore divider clicks
-            await callback_query.answer("This is just a divider", show_alert=False)
-            return
+        for prefix, download_format in _YTFMT_DOWNLOADS:
+            if data.startswith(prefix):
+                await download_format(client, callback_query, chat_id, formats_session['url'], data[len(prefix):])
+                return
         
         # If we get here, it's an unhandled format selection
         logging.warning(f"Unhandled YouTube format selection: {data}")
@@ -806,96 +1043,42 @@ async def youtube_format_selection_handler(client: Client, callback_query: types
 
 
 # Main menu and navigation handlers
-@app.on_callback_query(filters.regex(r"^(main_menu|stats)$"))
 @private_use_callback
-async def main_navigation_handler(client: Client, callback_query: types.CallbackQuery):
-    """Handle main navigation buttons"""
-    chat_id = callback_query.message.chat.id
-    data = callback_query.data
-    
+async def main_menu_callback_handler(client: Client, callback_query: types.CallbackQuery):
+    """Handle the main menu button"""
     try:
-        is_admin_user = await is_admin(client, callback_query.from_user.id)
+        is_admin_user = current_user_is_admin(callback_query.from_user.id)
+        keyboard = ADMIN_KEYBOARD if is_admin_user else MAIN_KEYBOARD
+        await callback_query.edit_message_text(
+            MAIN_MENU_TEXT,
+            reply_markup=keyboard
+        )
+        await callback_query.answer()
         
-        if data == "main_menu":
-            keyboard = create_admin_keyboard() if is_admin_user else create_main_keyboard()
-            await callback_query.edit_message_text(
-                "🏠 **Main Menu**\n\nChoose an option:",
-                reply_markup=keyboard
-            )
-            
-        elif data == "stats":
-            # Show real statistics for all users
-            from database.model import get_download_statistics, get_user_download_stats
-            import time
-            
-            # Get system stats
-            cpu_usage = psutil.cpu_percent()
-            memory = psutil.virtual_memory()
-            total, used, free, disk = psutil.disk_usage("/")
-            
-            # Get bot stats
-            bot_uptime = timeof_fmt(time.time() - botStartTime)
-            
-            # Get download statistics
-            try:
-                stats = get_download_statistics()
-                user_stats = get_user_download_stats(chat_id)
-            except Exception as e:
-                logging.error(f"Error getting download stats: {e}")
-                stats = {
-                    'total_downloads': 0,
-                    'successful_downloads': 0,
-                    'failed_downloads': 0,
-                    'total_users': 0,
-                    'recent_downloads_24h': 0
-                }
-                user_stats = {
-                    'total_downloads': 0,
-                    'successful_downloads': 0,
-                    'success_rate': 0
-                }
-            
-            stats_text = f"""📊 **Bot Statistics**
-
-🤖 **System Status:**
-• CPU Usage: {cpu_usage}%
-• RAM Usage: {memory.percent}%
-• Disk Usage: {disk}%
-• Bot Uptime: {bot_uptime}
+    except Exception as e:
+        logging.error(f"Error in main navigation handler: {e}")
+        await callback_query.answer("❌ An error occurred", show_alert=True)
 
-📈 **Download Statistics:**
-• Total Downloads: {stats.get('total_downloads', 0)}
-• Successful: {stats.get('successful_downloads', 0)}
-• Failed: {stats.get('failed_downloads', 0)}
-• Downloads Today: {stats.get('recent_downloads_24h', 0)}
 
-👥 **User Statistics:**
-• Total Users: {stats.get('total_users', 0)}
-• Your Downloads: {user_stats.get('total_downloads', 0)}
-• Your Success Rate: {user_stats.get('success_rate', 0)}%
-
-💾 **Storage:**
-• Total Space: {sizeof_fmt(total)}
-• Used: {sizeof_fmt(used)}
-• Free: {sizeof_fmt(free)}"""
-            
-            await callback_query.edit_message_text(
-                stats_text,
-                reply_markup=types.InlineKeyboardMarkup([
-                    [types.InlineKeyboardButton("🔄 Refresh", callback_data="stats")],
-                    [types.InlineKeyboardButton("🏠 Main Menu", callback_data="main_menu")]
-                ])
-            )
-            
+@private_use_callback
+async def stats_callback_handler(client: Client, callback_query: types.CallbackQuery):
+    """Handle the stats and stats refresh buttons"""
+    try:
+        # Show real statistics for all users
+        stats_text = await build_bot_stats_text(callback_query.message.chat.id)
+        
+        await callback_query.edit_message_text(
+            stats_text,
+            reply_markup=STATS_KEYBOARD
+        )
         await callback_query.answer()
         
     except Exception as e:
-        logging.error(f"Error in main navigation handler: {e}")
+        logging.error(f"Error in stats handler: {e}")
         await callback_query.answer("❌ An error occurred", show_alert=True)
 
 
 # Admin callback handlers
-@app.on_callback_query(filters.regex(r"^admin_"))
 @private_use_callback
 async def admin_callback_handler(client: Client, callback_query: types.CallbackQuery):
     """Handle admin buttons"""
@@ -903,7 +1086,7 @@ async def admin_callback_handler(client: Client, callback_query: types.CallbackQ
     data = callback_query.data
     
     # Check if user is admin
-    admin_status = await is_admin(client, callback_query.from_user.id)
+    admin_status = current_user_is_admin(callback_query.from_user.id)
     if not admin_status:
         await callback_query.answer("❌ Access denied. Admin only.", show_alert=True)
         return
@@ -911,66 +1094,11 @@ async def admin_callback_handler(client: Client, callback_query: types.CallbackQ
     try:
         if data == "admin_stats":
             # Show real statistics
-            from database.model import get_download_statistics, get_user_download_stats
-            import time
-            
-            # Get system stats
-            cpu_usage = psutil.cpu_percent()
-            memory = psutil.virtual_memory()
-            total, used, free, disk = psutil.disk_usage("/")
-            
-            # Get bot stats
-            bot_uptime = timeof_fmt(time.time() - botStartTime)
-            
-            # Get download statistics
-            try:
-                stats = get_download_statistics()
-                user_stats = get_user_download_stats(chat_id)
-            except Exception as e:
-                logging.error(f"Error getting download stats: {e}")
-                stats = {
-                    'total_downloads': 0,
-                    'successful_downloads': 0,
-                    'failed_downloads': 0,
-                    'total_users': 0,
-                    'downloads_today': 0
-                }
-                user_stats = {
-                    'total_downloads': 0,
-                    'successful_downloads': 0,
-                    'success_rate': 0
-                }
-            
-            stats_text = f"""📊 **Bot Statistics**
-
-🤖 **System Status:**
-• CPU Usage: {cpu_usage}%
-• RAM Usage: {memory.percent}%
-• Disk Usage: {disk}%
-• Bot Uptime: {bot_uptime}
-
-� **Download Statistics:**
-• Total Downloads: {stats.get('total_downloads', 0)}
-• Successful: {stats.get('successful_downloads', 0)}
-• Failed: {stats.get('failed_downloads', 0)}
-• Downloads Today: {stats.get('downloads_today', 0)}
-
-� **User Statistics:**
-• Total Users: {stats.get('total_users', 0)}
-• Your Downloads: {user_stats.get('downloads_count', 0)}
-• Your Success Rate: {user_stats.get('success_rate', 0)}%
-
-� **Storage:**
-• Total Space: {sizeof_fmt(total)}
-• Used: {sizeof_fmt(used)}
-• Free: {sizeof_fmt(free)}"""
+            stats_text = await build_bot_stats_text(chat_id)
             
             await callback_query.edit_message_text(
                 stats_text,
-                reply_markup=types.InlineKeyboardMarkup([
-                    [types.InlineKeyboardButton("🔄 Refresh", callback_data="admin_stats")],
-                    [types.InlineKeyboardButton("🏠 Main Menu", callback_data="main_menu")]
-                ])
+                reply_markup=ADMIN_STATS_KEYBOARD
             )
             
         await callback_query.answer()
@@ -980,6 +1108,43 @@ async def admin_callback_handler(client: Client, callback_query: types.CallbackQ
         await callback_query.answer("❌ An error occurred", show_alert=True)
 
 
+# Callback data routed by one lookup instead of one regex filter per handler:
+# exact values first, then the prefix keyed by the text before the first "_"
+_CALLBACK_EXACT = {
+    "check_access": check_access_callback,
+    "cancel_format_selection": cancel_format_selection_handler,
+    "main_menu": main_menu_callback_handler,
+    "stats": stats_callback_handler,
+}
+_CALLBACK_PREFIXES = {
+    "back": ("back_to_", back_navigation_handler),
+    "yt": (_YT_FORMAT_PREFIX, youtube_format_callback_handler),
+    "ytfmt": ("ytfmt_", youtube_format_selection_handler),
+    "admin": ("admin_", admin_callback_handler),
+}
+
+
+def route_callback(data: str | None):
+    """Return the handler for a callback's data, or None if another module owns it"""
+    if not data:
+        return None
+    handler = _CALLBACK_EXACT.get(data)
+    if handler is None:
+        prefix, handler = _CALLBACK_PREFIXES.get(data.partition("_")[0], ("", None))
+        if handler is not None and (len(data) <= len(prefix) or not data.startswith(prefix)):
+            handler = None
+    return handler
+
+
+# Only claim our own callbacks so the admin panel's handler still sees the rest
+routed_callback = filters.create(lambda _, __, query: route_callback(query.data) is not None)
+
+
+@app.on_callback_query(routed_callback)
+async def callback_router(client: Client, callback_query: types.CallbackQuery):
+    return await route_callback(callback_query.data)(client, callback_query)
+
+
 # Legacy wrapper for private use
 def private_use_legacy(func):
     """Decorator for private use with legacy support"""
@@ -1028,12 +1193,12 @@ async def admin_commands_handler(client: Client, message: types.Message):
 async def direct_command_handler(client: Client, message: types.Message):
     """Handle /direct command for direct downloads"""
     chat_id = message.chat.id
-    init_user(chat_id)
+    await ensure_user(chat_id)
     
     # Log user activity
-    log_user_activity(chat_id, 'command', {'command': 'direct'})
+    queue_db_log(log_user_activity, chat_id, 'command', {'command': 'direct'})
     
-    await set_user_state(chat_id, "direct_download")
+    set_user_state(chat_id, "direct_download")
     await client.send_message(
         chat_id,
         "📥 **Direct Download Mode**\n\nSend me a direct link to download the file directly using aria2/requests.\n\n"
@@ -1042,10 +1207,42 @@ async def direct_command_handler(client: Client, message: types.Message):
         "• Large files\n"
         "• Direct file links\n\n"
         "_Send any other message to cancel._",
-        reply_markup=create_back_keyboard()
+        reply_markup=BACK_KEYBOARD
     )
 
 
+SHUTDOWN_DB_LOG_TIMEOUT = 10
+
+
+async def stop_background_tasks():
+    """Flush queued DB log records, then cancel the download workers, DB log consumer and background tasks"""
+    if _db_log_consumers:
+        try:
+            await asyncio.wait_for(db_log_queue.join(), SHUTDOWN_DB_LOG_TIMEOUT)
+        except asyncio.TimeoutError:
+            logging.warning("Dropping %d queued DB log records at shutdown", db_log_queue.qsize())
+    
+    tasks = [*_download_workers, *_db_log_consumers, *_background_tasks]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _download_workers.clear()
+    _db_log_consumers.clear()
+
+
+async def run_bot():
+    """Start the client, idle until a stop signal, then shut everything down in order"""
+    await app.start()
+    # Start system statistics logging
+    start_stats_logging()
+    try:
+        await idle()
+    finally:
+        stop_stats_logging()
+        await stop_background_tasks()
+        await app.stop()
+
+
 if __name__ == "__main__":
     # Setup comprehensive logging first
     setup_comprehensive_logging()
@@ -1068,20 +1265,17 @@ Production Ready with Enhanced Analytics & Error Handling
     # Register admin handlers
     register_admin_handlers(app)
     
-    # Start system statistics logging
-    start_stats_logging()
-    
     try:
         logging.info("Bot is starting...")
-        app.run()
+        # The client is bound to the loop it was created on, so run the
+        # coroutine through it rather than asyncio.run()
+        app.run(run_bot())
     except KeyboardInterrupt:
         logging.info("Bot shutdown requested by user")
         print("\nShutting down gracefully...")
-        stop_stats_logging()
     except Exception as e:
         logging.critical(f"Bot crashed with critical error: {e}", exc_info=True)
         print(f"Bot crashed: {e}")
-        stop_stats_logging()
         raise
     finally:
         logging.info("=== BOT SHUTDOWN ===")
@@ -12,7 +12,7 @@ import tempfile
 import time
 import uuid
 from http.cookiejar import MozillaCookieJar
-from urllib.parse import quote_plus, urlparse
+from urllib.parse import quote_plus, urlsplit
 
 import ffmpeg
 
@@ -35,13 +35,16 @@ def timeof_fmt(seconds: int | float):
     return result
 
 
+_YOUTUBE_HOSTS = frozenset({"youtube.com", "www.youtube.com", "m.youtube.com", "music.youtube.com", "youtu.be"})
+
+
 def is_youtube(url: str) -> bool:
     try:
         if not url or not isinstance(url, str):
             return False
 
-        parsed = urlparse(url)
-        return parsed.netloc.lower() in {'youtube.com', 'www.youtube.com', 'youtu.be'}
+        # hostname is already lowercased and has any port/credentials stripped
+        return urlsplit(url).hostname in _YOUTUBE_HOSTS
 
     except Exception:
         return False
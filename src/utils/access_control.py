@@ -2,17 +2,23 @@
 # coding: utf-8
 
 import asyncio
+import functools
 import logging
+import random
+from dataclasses import dataclass
 from typing import List, Tuple
 
 from pyrogram import Client
 from pyrogram.errors import FloodWait, UserNotParticipant, ChannelPrivate, ChatAdminRequired
 
 from config.config import ADMIN_IDS, ACCESS_CONTROL_ENABLED
-from database.model import check_user_access, get_required_channels, check_full_user_access
+from database.model import check_user_access, get_required_channels
 
 logger = logging.getLogger(__name__)
 
+# FloodWait retries per membership check before giving the user the benefit of the doubt
+MEMBERSHIP_CHECK_RETRIES = 3
+
 
 def get_admin_list() -> List[int]:
     """Get list of admin user IDs from environment"""
@@ -45,22 +51,26 @@ def get_env_required_channels() -> List[int]:
 
 async def check_channel_membership(client: Client, user_id: int, channel_id: int) -> bool:
     """Check if user is a member of a specific channel"""
-    try:
-        member = await client.get_chat_member(channel_id, user_id)
-        # Consider all non-kicked statuses as membership
-        return member.status not in ["kicked", "banned"]
-    except UserNotParticipant:
-        return False
-    except (ChannelPrivate, ChatAdminRequired):
-        logger.warning(f"Bot cannot access channel {channel_id}")
-        return True  # Give benefit of doubt if bot can't check
-    except FloodWait as e:
-        logger.warning(f"FloodWait {e.value} seconds for channel membership check")
-        await asyncio.sleep(e.value)
-        return await check_channel_membership(client, user_id, channel_id)
-    except Exception as e:
-        logger.error(f"Error checking membership for user {user_id} in channel {channel_id}: {e}")
-        return True  # Give benefit of doubt on unexpected errors
+    for _ in range(MEMBERSHIP_CHECK_RETRIES):
+        try:
+            member = await client.get_chat_member(channel_id, user_id)
+            # Consider all non-kicked statuses as membership
+            return member.status not in ["kicked", "banned"]
+        except UserNotParticipant:
+            return False
+        except (ChannelPrivate, ChatAdminRequired):
+            logger.warning(f"Bot cannot access channel {channel_id}")
+            return True  # Give benefit of doubt if bot can't check
+        except FloodWait as e:
+            logger.warning(f"FloodWait {e.value} seconds for channel membership check")
+            # Jitter so checks that hit the same limit don't all retry at once
+            await asyncio.sleep(e.value + random.uniform(0, 0.5))
+        except Exception as e:
+            logger.error(f"Error checking membership for user {user_id} in channel {channel_id}: {e}")
+            return True  # Give benefit of doubt on unexpected errors
+    
+    logger.warning(f"Giving up membership check for user {user_id} in channel {channel_id} after repeated FloodWait")
+    return True
 
 
 async def check_user_channel_access(client: Client, user_id: int) -> Tuple[bool, List[int]]:
@@ -74,101 +84,76 @@ async def check_user_channel_access(client: Client, user_id: int) -> Tuple[bool,
     if not db_channels:
         return True, []  # No channels required
     
-    missing_channels = []
-    
-    for channel_id in db_channels:
-        is_member = await check_channel_membership(client, user_id, channel_id)
-        if is_member:
-            return True, []  # User is member of at least one channel
-        else:
-            missing_channels.append(channel_id)
+    # Ask about every channel at once; the first membership found settles it
+    tasks = [
+        asyncio.create_task(check_channel_membership(client, user_id, channel_id))
+        for channel_id in db_channels
+    ]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            if await next_result:
+                return True, []  # User is member of at least one channel
+    finally:
+        for task in tasks:
+            task.cancel()
     
-    return False, missing_channels
+    return False, db_channels
 
 
-async def check_full_user_access(client: Client, user_id: int) -> dict:
-    """
-    Comprehensive access check for a user
-    Returns: {
-        'has_access': bool,
-        'reason': str,
-        'user_status': int,
-        'missing_channels': list,
-        'is_admin': bool
-    }
-    """
+@dataclass(slots=True, frozen=True)
+class AccessResult:
+    """Outcome of check_full_user_access; cached and shared, so it is immutable"""
+    has_access: bool
+    reason: str
+    user_status: int = 0
+    missing_channels: Tuple[int, ...] = ()
+    is_admin: bool = False
+
+
+async def check_full_user_access(client: Client, user_id: int) -> AccessResult:
+    """Comprehensive access check for a user"""
     if not ACCESS_CONTROL_ENABLED:
-        return {
-            'has_access': True,
-            'reason': 'access_control_disabled',
-            'user_status': 0,
-            'missing_channels': [],
-            'is_admin': False
-        }
+        return AccessResult(True, 'access_control_disabled', is_admin=user_id in get_admin_set())
     
-    admins = get_admin_list()
+    admins = get_admin_set()
     is_admin = user_id in admins
     
     # Basic access check (admin, whitelist, banned)
-    basic_check = check_user_access(user_id, admins)
+    basic_check = await asyncio.to_thread(check_user_access, user_id, admins)
+    user_status = basic_check['user_status']
     
     if basic_check['has_access']:
-        return {
-            'has_access': True,
-            'reason': basic_check['reason'],
-            'user_status': basic_check['user_status'],
-            'missing_channels': [],
-            'is_admin': is_admin
-        }
+        return AccessResult(True, basic_check['reason'], user_status, is_admin=is_admin)
     
     if basic_check['reason'] == 'banned':
-        return {
-            'has_access': False,
-            'reason': 'banned',
-            'user_status': basic_check['user_status'],
-            'missing_channels': [],
-            'is_admin': is_admin
-        }
+        return AccessResult(False, 'banned', user_status, is_admin=is_admin)
     
     # Check channel membership for normal users
     if basic_check['reason'] == 'needs_channel_check':
         has_channel_access, missing_channels = await check_user_channel_access(client, user_id)
         
         if has_channel_access:
-            return {
-                'has_access': True,
-                'reason': 'channel_member',
-                'user_status': basic_check['user_status'],
-                'missing_channels': [],
-                'is_admin': is_admin
-            }
+            return AccessResult(True, 'channel_member', user_status, is_admin=is_admin)
         else:
-            return {
-                'has_access': False,
-                'reason': 'no_channel_membership',
-                'user_status': basic_check['user_status'],
-                'missing_channels': missing_channels,
-                'is_admin': is_admin
-            }
+            return AccessResult(False, 'no_channel_membership', user_status, tuple(missing_channels), is_admin)
     
-    return {
-        'has_access': False,
-        'reason': 'unknown',
-        'user_status': basic_check['user_status'],
-        'missing_channels': [],
-        'is_admin': is_admin
-    }
+    return AccessResult(False, 'unknown', user_status, is_admin=is_admin)
+
+
+@functools.lru_cache(maxsize=None)
+def get_admin_set() -> frozenset:
+    """Get admin user IDs as a set, parsed once since ADMIN_IDS is fixed at startup"""
+    return frozenset(get_admin_list())
 
 
 async def is_admin(client: Client, user_id: int) -> bool:
     """Check if user is an admin"""
-    admins = get_admin_list()
-    return user_id in admins
+    return user_id in get_admin_set()
 
 
-def get_access_denied_message(access_result: dict) -> str:
+def get_access_denied_message(access_result: AccessResult) -> str:
     """Generate appropriate access denied message"""
-    reason = access_result.get('reason', 'unknown')
+    reason = access_result.reason
     
     if reason == 'banned':
         return "You have been banned from using this bot, please go fuck yourself"
@@ -1,20 +1,118 @@
 """
 Decorators for access control and other common functionality
 """
+import asyncio
 import logging
+import time
+from contextvars import ContextVar
 
 try:
     from pyrogram import Client, types, enums
 except ImportError:
     from kurigram import Client, types, enums
 
-from .access_control import check_full_user_access, get_access_denied_message
+from config.config import ACCESS_CONTROL_ENABLED
+from .access_control import AccessResult, check_full_user_access, get_access_denied_message, get_admin_set
+
+logger = logging.getLogger(__name__)
+
+# Access result of the update being handled, set by private_use/private_use_callback
+# and access_control_middleware for the duration of the handler
+access_info_var: ContextVar[AccessResult] = ContextVar('access_info')
+
+# Access results are cached per user for a short time so that bursts of
+# messages don't repeat the database and channel membership checks.
+ACCESS_CACHE_TTL = 30
+_access_cache = {}  # user_id -> (checked_at, access_result)
+_access_inflight = {}  # user_id -> asyncio.Future of the check in progress
+# Bumped by invalidate_access so a check that started before an invalidation
+# doesn't write its stale result back into the cache
+_access_epoch = 0  # every user
+_access_generation = {}  # user_id -> that user only
+
+
+def _access_version(chat_id: int) -> tuple:
+    return _access_epoch, _access_generation.get(chat_id, 0)
+
+
+def invalidate_access(chat_id: int = None):
+    """Drop the cached access result for a user, or for everyone if no id is given"""
+    global _access_epoch
+    if chat_id is None:
+        _access_cache.clear()
+        _access_inflight.clear()
+        _access_generation.clear()
+        _access_epoch += 1
+    else:
+        _access_cache.pop(chat_id, None)
+        _access_inflight.pop(chat_id, None)
+        _access_generation[chat_id] = _access_generation.get(chat_id, 0) + 1
+
+
+async def get_cached_access(client: Client, chat_id: int) -> AccessResult:
+    """Return check_full_user_access() for the user, reusing a recent result"""
+    cached = _access_cache.get(chat_id)
+    if cached and time.monotonic() - cached[0] < ACCESS_CACHE_TTL:
+        return cached[1]
+
+    # Concurrent lookups for the same user share the check already in flight
+    inflight = _access_inflight.get(chat_id)
+    if inflight is not None:
+        try:
+            return await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            # Only our own cancellation propagates; if the check's owner was
+            # cancelled instead, start (or join) a fresh check
+            if not inflight.cancelled() or asyncio.current_task().cancelling():
+                raise
+        return await get_cached_access(client, chat_id)
+
+    future = asyncio.get_running_loop().create_future()
+    _access_inflight[chat_id] = future
+    version = _access_version(chat_id)
+    try:
+        access_result = await check_full_user_access(client, chat_id)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # waiters re-raise it; don't log it as unretrieved
+        raise
+    else:
+        if _access_version(chat_id) == version:
+            _access_cache[chat_id] = (time.monotonic(), access_result)
+        future.set_result(access_result)
+        return access_result
+    finally:
+        # An invalidation may already have dropped or replaced our entry
+        if _access_inflight.get(chat_id) is future:
+            del _access_inflight[chat_id]
+
+
+def current_user_is_admin(user_id: int) -> bool:
+    """Admin status of the user behind the update being handled"""
+    access_result = access_info_var.get(None)
+    if access_result is None:
+        # Not behind an access check (or access control is off): look it up
+        return user_id in get_admin_set()
+    return access_result.is_admin
 
 
 def private_use(func):
     """Decorator for message handlers with access control"""
+    if not ACCESS_CONTROL_ENABLED:
+        # Everyone has access, so only the private chat filter is left
+        async def unchecked(client: Client, message: types.Message):
+            if message.chat.type != enums.ChatType.PRIVATE:
+                return
+            return await func(client, message)
+
+        return unchecked
+
     async def wrapper(client: Client, message: types.Message):
-        chat_id = getattr(message.from_user, "id", None)
+        from_user = message.from_user
+        chat_id = from_user.id if from_user is not None else None
 
         # Only allow private chats for this bot now
         if message.chat.type != enums.ChatType.PRIVATE:
@@ -24,21 +122,28 @@ def private_use(func):
         # Access control check
         if chat_id:
             try:
-                access_result = await check_full_user_access(client, chat_id)
-                if not access_result['has_access']:
+                access_result = await get_cached_access(client, chat_id)
+                if not access_result.has_access:
                     denial_message = get_access_denied_message(access_result)
                     await message.reply_text(denial_message, quote=True)
-                    logging.info(f"Access denied for user {chat_id}: {access_result['reason']}")
+                    logging.info("Access denied for user %s: %s", chat_id, access_result.reason)
                     return
                 
                 # Log successful access
-                logging.info(f"Access granted for user {chat_id}: {access_result['reason']}")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Access granted for user %s: %s", chat_id, access_result.reason)
                 
             except Exception as e:
-                logging.error(f"Error checking access for user {chat_id}: {e}")
+                logging.error("Error checking access for user %s: %s", chat_id, e)
                 await message.reply_text("❌ **Access Check Failed**\n\nThere was an error verifying your access. Please try again later.", quote=True)
                 return
 
+            token = access_info_var.set(access_result)
+            try:
+                return await func(client, message)
+            finally:
+                access_info_var.reset(token)
+
         return await func(client, message)
 
     return wrapper
@@ -46,33 +151,50 @@ def private_use(func):
 
 def private_use_callback(func):
     """Decorator for callback query handlers with access control"""
+    if not ACCESS_CONTROL_ENABLED:
+        async def unchecked(client: Client, callback_query: types.CallbackQuery):
+            if callback_query.message.chat.type != enums.ChatType.PRIVATE:
+                return
+            return await func(client, callback_query)
+
+        return unchecked
+
     async def wrapper(client: Client, callback_query: types.CallbackQuery):
-        chat_id = getattr(callback_query.from_user, "id", None)
+        from_user = callback_query.from_user
+        chat_id = from_user.id if from_user is not None else None
 
         # Only allow private chats for this bot now
         if callback_query.message.chat.type != enums.ChatType.PRIVATE:
-            logging.debug("Ignoring group/channel callback query")
-            await callback_query.answer("❌ This bot only works in private chats", show_alert=True)
+            # No answer either: it would spend the outgoing message budget on noise
+            logging.debug("Ignoring group/channel callback: %s", callback_query.data)
             return
 
         # Access control check
         if chat_id:
             try:
-                access_result = await check_full_user_access(client, chat_id)
-                if not access_result['has_access']:
+                access_result = await get_cached_access(client, chat_id)
+                if not access_result.has_access:
                     denial_message = get_access_denied_message(access_result)
                     await callback_query.answer("❌ Access denied", show_alert=True)
-                    logging.info(f"Access denied for user {chat_id}: {access_result['reason']}")
+                    logging.info("Access denied for user %s: %s", chat_id, access_result.reason)
                     return
                 
                 # Log successful access
-                logging.info(f"Access granted for user {chat_id}: {access_result['reason']}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Callback access granted for user %s: %s", chat_id, access_result.reason)
                 
             except Exception as e:
-                logging.error(f"Error checking access for user {chat_id}: {e}")
+                logging.error("Error checking access for user %s: %s", chat_id, e)
                 await callback_query.answer("❌ Access check failed", show_alert=True)
                 return
 
+            # Handlers read this through current_user_is_admin instead of repeating the admin check
+            token = access_info_var.set(access_result)
+            try:
+                return await func(client, callback_query)
+            finally:
+                access_info_var.reset(token)
+
         return await func(client, callback_query)
 
     return wrapper
@@ -4,14 +4,130 @@
 # ytdlbot - error_handling.py
 # Error handling and logging utilities
 
+import asyncio
+import atexit
 import functools
 import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
 import sys
-import traceback
+import threading
+import time
 from typing import Any, Callable, Optional
 
+from config.config import LOG_BACKUPS, LOG_MAX_BYTES
+
 logger = logging.getLogger(__name__)
 
+_log_listener: Optional[logging.handlers.QueueListener] = None
+_log_flush_stop: Optional[threading.Event] = None
+
+# Buffered log files are flushed at least this often (seconds)
+LOG_FLUSH_INTERVAL = 1.0
+
+
+class BufferedFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Size-rotated file handler that batches writes in a large buffer instead
+    of flushing every record. Errors are flushed immediately; everything else
+    is flushed by size or by the periodic flusher started in
+    setup_comprehensive_logging.
+    """
+    
+    def __init__(self, filename: str, encoding: str = 'utf-8', buffer_size: int = 65536,
+                 max_bytes: int = LOG_MAX_BYTES, backup_count: int = LOG_BACKUPS):
+        self.buffer_size = buffer_size
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        # Track the size ourselves: the stock rollover check seeks the stream,
+        # which would flush the buffer on every record
+        self._size = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+    
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self.buffer_size,
+                    encoding=self.encoding, errors=self.errors)
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            msg = self.format(record) + self.terminator
+            # maxBytes is in bytes and log lines carry multi-byte emoji
+            size = len(msg.encode(self.encoding, self.errors or 'strict'))
+            if self.maxBytes > 0 and self._size and self._size + size > self.maxBytes:
+                self.doRollover()
+                self._size = 0
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(msg)
+            self._size += size
+            if record.levelno >= logging.ERROR:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class DedupeFilter(logging.Filter):
+    """
+    Drop repeats of noisy per-update messages: a template logged again for
+    the same first argument (usually the user ID) within `window` seconds.
+    Other records always pass.
+    """
+    
+    TEMPLATES = frozenset({
+        "Ignoring non-private chat: %s",
+        "Ignoring group/channel message: %s",
+        "Ignoring group/channel callback: %s",
+        "Access granted for user %s: %s",
+        "Callback access granted for user %s: %s",
+        "Access denied for user %s: %s",
+    })
+    
+    def __init__(self, window: float = 5.0, max_keys: int = 10000):
+        super().__init__()
+        self.window = window
+        self.max_keys = max_keys
+        self._last_seen = {}  # (template, first arg) -> monotonic time last let through
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.msg not in self.TEMPLATES:
+            return True
+        key = (record.msg, record.args[0] if record.args else None)
+        now = time.monotonic()
+        last = self._last_seen.get(key)
+        if last is not None and now - last < self.window:
+            return False
+        if len(self._last_seen) >= self.max_keys:
+            self._last_seen.clear()
+        self._last_seen[key] = now
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """
+    Let through only a random fraction of the noisy per-update DEBUG messages
+    (the DedupeFilter templates). Every other record passes, including any
+    record that carries a traceback.
+    """
+    
+    def __init__(self, rate: float = 0.1, templates: frozenset = DedupeFilter.TEMPLATES):
+        super().__init__()
+        self.rate = rate
+        self.templates = templates
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.DEBUG or record.exc_info or record.msg not in self.templates:
+            return True
+        return random.random() < self.rate
+
+
+def _flush_periodically(handler: logging.Handler, stop: threading.Event):
+    """Flush a buffered handler every LOG_FLUSH_INTERVAL seconds until stopped"""
+    while not stop.wait(LOG_FLUSH_INTERVAL):
+        handler.flush()
+
 
 def setup_comprehensive_logging(log_level: str = "INFO"):
     """Setup comprehensive logging configuration"""
@@ -27,15 +143,38 @@ def setup_comprehensive_logging(log_level: str = "INFO"):
     
     log_level_int = level_map.get(log_level.upper(), logging.INFO)
     
-    # Configure root logger
-    logging.basicConfig(
-        level=log_level_int,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler('bot.log', encoding='utf-8')
-        ]
-    )
+    global _log_listener, _log_flush_stop
+    
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_handler = BufferedFileHandler('bot.log')
+    handlers = [
+        logging.StreamHandler(sys.stdout),
+        file_handler
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    # Handlers run on a listener thread; logging calls only enqueue the record,
+    # so the event loop never waits on a console or disk write
+    stop_log_listener()
+    log_queue = queue.SimpleQueue()
+    _log_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+    _log_flush_stop = threading.Event()
+    threading.Thread(target=_flush_periodically, args=(file_handler, _log_flush_stop), daemon=True).start()
+    
+    # Configure root logger, replacing the console handler installed by config
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    # Filter on the queue side: records are still templates here, and dropped
+    # records never reach the queue
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(DedupeFilter())
+    queue_handler.addFilter(SampleFilter())
+    root.addHandler(queue_handler)
+    root.setLevel(log_level_int)
     
     # Set specific loggers to reduce noise
     logging.getLogger("pyrogram").setLevel(logging.WARNING)
@@ -44,7 +183,82 @@ def setup_comprehensive_logging(log_level: str = "INFO"):
     logging.getLogger("urllib3").setLevel(logging.WARNING)
     logging.getLogger("httpx").setLevel(logging.WARNING)
     
-    logger.info(f"Logging configured with level: {log_level}")
+    logger.info("Logging configured with level: %s", log_level)
+
+
+@atexit.register
+def stop_log_listener():
+    """Flush queued log records and stop the listener and flusher threads"""
+    global _log_listener, _log_flush_stop
+    
+    if _log_flush_stop is not None:
+        _log_flush_stop.set()
+        _log_flush_stop = None
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
+
+
+# Error classification: one regex pass finds every known phrase, and the
+# *_ORDER tuples keep the precedence the old if/elif chains had when a
+# message contains more than one of them
+_TELEGRAM_ERROR_RE = re.compile(
+    r"(?P<flood>flood)|(?P<chat_not_found>chat not found)|(?P<user_not_found>user not found)"
+    r"|(?P<not_modified>message not modified)|(?P<forbidden>forbidden)|(?P<bad_request>bad request)",
+    re.IGNORECASE
+)
+_TELEGRAM_ERROR_ORDER = ("flood", "chat_not_found", "user_not_found", "not_modified", "forbidden", "bad_request")
+_TELEGRAM_ERROR_MESSAGES = {
+    "flood": "⏰ **Rate Limited**\n\nToo many requests. Please wait a moment and try again.",
+    "chat_not_found": "❌ **Chat Not Found**\n\nThe chat or channel could not be found.",
+    "user_not_found": "❌ **User Not Found**\n\nThe specified user could not be found.",
+    "not_modified": None,
+    "forbidden": "🚫 **Access Forbidden**\n\nThe bot doesn't have permission to perform this action.",
+    "bad_request": "❌ **Invalid Request**\n\nThe request was invalid. Please check your input and try again.",
+}
+
+_DOWNLOAD_ERROR_RE = re.compile(
+    r"(?P<unavailable>Video unavailable)|(?P<private>Private video)|(?P<not_available>This video is not available)"
+    r"|(?P<rate_limited>HTTP Error 429)|(?P<no_formats>No video formats found)|(?P<unsupported>Unsupported URL)"
+    r"|(?P<network>(?i:network|connection))|(?P<timeout>(?i:timeout))"
+)
+_DOWNLOAD_ERROR_ORDER = (
+    "unavailable", "private", "not_available", "rate_limited", "no_formats", "unsupported", "network", "timeout"
+)
+_DOWNLOAD_ERROR_MESSAGES = {
+    "unavailable": "❌ **Video Unavailable**\n\nThis video is private, unavailable, or has been removed.",
+    "private": "❌ **Video Unavailable**\n\nThis video is private, unavailable, or has been removed.",
+    "not_available": "❌ **Video Not Available**\n\nThis video is not available in your region or has been restricted.",
+    "rate_limited": "⏰ **Rate Limited**\n\nToo many requests to the video platform. Please wait and try again later.",
+    "no_formats": "❌ **No Formats Available**\n\nNo downloadable formats were found for this video.",
+    "unsupported": "❌ **Unsupported Platform**\n\nThis platform or URL format is not supported.",
+    "network": "🌐 **Network Error**\n\nNetwork connection failed. Please check your internet connection and try again.",
+    "timeout": "⏰ **Timeout Error**\n\nThe download timed out. The video might be too large or the server is slow.",
+}
+# Download failures that are expected and only logged as warnings
+_DOWNLOAD_WARNING_LABELS = {
+    "unavailable": "Video unavailable",
+    "private": "Private video",
+    "not_available": "Video not available",
+    "rate_limited": "Rate limited",
+}
+
+
+def _classify(pattern: re.Pattern, order: tuple, error_msg: str) -> Optional[str]:
+    """Return the highest-precedence error kind found in the message, or None"""
+    found = {match.lastgroup for match in pattern.finditer(error_msg)}
+    if not found:
+        return None
+    for kind in order:
+        if kind in found:
+            return kind
+
+
+def _classify_download_error(error_msg: str) -> Optional[str]:
+    """Classify a download error message into one of _DOWNLOAD_ERROR_ORDER, or None"""
+    return _classify(_DOWNLOAD_ERROR_RE, _DOWNLOAD_ERROR_ORDER, error_msg)
 
 
 def error_handler(func: Callable) -> Callable:
@@ -53,13 +267,10 @@ def error_handler(func: Callable) -> Callable:
     @functools.wraps(func)
     async def async_wrapper(*args, **kwargs):
         try:
-            if asyncio.iscoroutinefunction(func):
-                return await func(*args, **kwargs)
-            else:
-                return func(*args, **kwargs)
+            return await func(*args, **kwargs)
         except Exception as e:
-            logger.error(f"Error in {func.__name__}: {e}")
-            logger.debug(f"Traceback: {traceback.format_exc()}")
+            logger.error("Error in %s: %s", func.__name__, e)
+            logger.debug("Traceback", exc_info=True)
             raise
     
     @functools.wraps(func)
@@ -67,43 +278,35 @@ def error_handler(func: Callable) -> Callable:
         try:
             return func(*args, **kwargs)
         except Exception as e:
-            logger.error(f"Error in {func.__name__}: {e}")
-            logger.debug(f"Traceback: {traceback.format_exc()}")
+            logger.error("Error in %s: %s", func.__name__, e)
+            logger.debug("Traceback", exc_info=True)
             raise
     
-    import asyncio
     if asyncio.iscoroutinefunction(func):
         return async_wrapper
     else:
         return sync_wrapper
 
 
+def _log_download_error(func_name: str, error_msg: str):
+    """Log expected download failures as warnings and anything else as an error"""
+    label = _DOWNLOAD_WARNING_LABELS.get(_classify_download_error(error_msg))
+    if label:
+        logger.warning("%s in %s: %s", label, func_name, error_msg)
+    else:
+        logger.error("Download error in %s: %s", func_name, error_msg)
+        logger.debug("Traceback", exc_info=True)
+
+
 def download_error_handler(func: Callable) -> Callable:
     """Decorator for download-specific error handling"""
     
     @functools.wraps(func)
     async def async_wrapper(*args, **kwargs):
         try:
-            if asyncio.iscoroutinefunction(func):
-                return await func(*args, **kwargs)
-            else:
-                return func(*args, **kwargs)
+            return await func(*args, **kwargs)
         except Exception as e:
-            error_msg = str(e)
-            
-            # Handle specific download errors
-            if "Video unavailable" in error_msg:
-                logger.warning(f"Video unavailable in {func.__name__}: {error_msg}")
-            elif "Private video" in error_msg:
-                logger.warning(f"Private video in {func.__name__}: {error_msg}")
-            elif "This video is not available" in error_msg:
-                logger.warning(f"Video not available in {func.__name__}: {error_msg}")
-            elif "HTTP Error 429" in error_msg:
-                logger.warning(f"Rate limited in {func.__name__}: {error_msg}")
-            else:
-                logger.error(f"Download error in {func.__name__}: {error_msg}")
-                logger.debug(f"Traceback: {traceback.format_exc()}")
-            
+            _log_download_error(func.__name__, str(e))
             raise
     
     @functools.wraps(func)
@@ -111,24 +314,9 @@ def download_error_handler(func: Callable) -> Callable:
         try:
             return func(*args, **kwargs)
         except Exception as e:
-            error_msg = str(e)
-            
-            # Handle specific download errors
-            if "Video unavailable" in error_msg:
-                logger.warning(f"Video unavailable in {func.__name__}: {error_msg}")
-            elif "Private video" in error_msg:
-                logger.warning(f"Private video in {func.__name__}: {error_msg}")
-            elif "This video is not available" in error_msg:
-                logger.warning(f"Video not available in {func.__name__}: {error_msg}")
-            elif "HTTP Error 429" in error_msg:
-                logger.warning(f"Rate limited in {func.__name__}: {error_msg}")
-            else:
-                logger.error(f"Download error in {func.__name__}: {error_msg}")
-                logger.debug(f"Traceback: {traceback.format_exc()}")
-            
+            _log_download_error(func.__name__, str(e))
             raise
     
-    import asyncio
     if asyncio.iscoroutinefunction(func):
         return async_wrapper
     else:
@@ -138,58 +326,26 @@ def download_error_handler(func: Callable) -> Callable:
 def handle_telegram_error(error: Exception) -> str:
     """Handle Telegram-specific errors and return user-friendly messages"""
     error_msg = str(error)
+    kind = _classify(_TELEGRAM_ERROR_RE, _TELEGRAM_ERROR_ORDER, error_msg)
     
-    if "flood" in error_msg.lower():
-        return "⏰ **Rate Limited**\n\nToo many requests. Please wait a moment and try again."
-    
-    elif "chat not found" in error_msg.lower():
-        return "❌ **Chat Not Found**\n\nThe chat or channel could not be found."
-    
-    elif "user not found" in error_msg.lower():
-        return "❌ **User Not Found**\n\nThe specified user could not be found."
-    
-    elif "message not modified" in error_msg.lower():
-        return None  # Silently ignore message not modified errors
-    
-    elif "forbidden" in error_msg.lower():
-        return "🚫 **Access Forbidden**\n\nThe bot doesn't have permission to perform this action."
-    
-    elif "bad request" in error_msg.lower():
-        return "❌ **Invalid Request**\n\nThe request was invalid. Please check your input and try again."
-    
-    else:
-        logger.error(f"Unhandled Telegram error: {error_msg}")
+    if kind is None:
+        logger.error("Unhandled Telegram error: %s", error_msg)
         return "❌ **Unexpected Error**\n\nAn unexpected error occurred. Please try again later."
+    
+    # Message not modified maps to None and is silently ignored
+    return _TELEGRAM_ERROR_MESSAGES[kind]
 
 
 def handle_download_error(error: Exception) -> str:
     """Handle download-specific errors and return user-friendly messages"""
     error_msg = str(error)
+    kind = _classify_download_error(error_msg)
     
-    if "Video unavailable" in error_msg or "Private video" in error_msg:
-        return "❌ **Video Unavailable**\n\nThis video is private, unavailable, or has been removed."
-    
-    elif "This video is not available" in error_msg:
-        return "❌ **Video Not Available**\n\nThis video is not available in your region or has been restricted."
-    
-    elif "HTTP Error 429" in error_msg:
-        return "⏰ **Rate Limited**\n\nToo many requests to the video platform. Please wait and try again later."
-    
-    elif "No video formats found" in error_msg:
-        return "❌ **No Formats Available**\n\nNo downloadable formats were found for this video."
-    
-    elif "Unsupported URL" in error_msg:
-        return "❌ **Unsupported Platform**\n\nThis platform or URL format is not supported."
-    
-    elif "network" in error_msg.lower() or "connection" in error_msg.lower():
-        return "🌐 **Network Error**\n\nNetwork connection failed. Please check your internet connection and try again."
-    
-    elif "timeout" in error_msg.lower():
-        return "⏰ **Timeout Error**\n\nThe download timed out. The video might be too large or the server is slow."
-    
-    else:
-        logger.error(f"Unhandled download error: {error_msg}")
+    if kind is None:
+        logger.error("Unhandled download error: %s", error_msg)
         return "❌ **Download Failed**\n\nThe download failed due to an unexpected error. Please try again."
+    
+    return _DOWNLOAD_ERROR_MESSAGES[kind]
 
 
 class BotError(Exception):
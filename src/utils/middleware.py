@@ -7,11 +7,45 @@ from typing import Union
 from pyrogram import Client, types, enums
 from pyrogram.types import Message, CallbackQuery
 
-from utils.access_control import check_full_user_access, get_access_denied_message, get_admin_list
-from database.model import init_user, get_required_channels
+from utils.access_control import AccessResult, get_access_denied_message, get_admin_set
+from utils.decorators import access_info_var, get_cached_access
+from database.model import init_user, get_required_channels, get_required_channels_version
 
 logger = logging.getLogger(__name__)
 
+# Join keyboard built for a given required-channels version
+_join_keyboard_cache = {"version": None, "keyboard": None}
+
+
+async def _deny_message(client: Client, update: Message, user_id: int, denial_message: str):
+    await update.reply(denial_message, quote=True)
+
+
+async def _deny_callback(client: Client, update: CallbackQuery, user_id: int, denial_message: str):
+    await update.answer("❌ Access denied", show_alert=True)
+    # Also send a message explaining the denial
+    if update.message:
+        try:
+            await update.message.edit_text(denial_message)
+        except:
+            await client.send_message(user_id, denial_message)
+
+
+# Per update type: (user, chat) extractor, denial sender, whether it is a callback.
+# Resolved with one dict lookup on type(update) instead of repeated isinstance checks.
+_UPDATE_DISPATCH = {
+    Message: (lambda u: (u.from_user, u.chat), _deny_message, False),
+    CallbackQuery: (lambda u: (u.from_user, u.message.chat if u.message else None), _deny_callback, True),
+}
+
+
+async def _notify(update: Union[Message, CallbackQuery], is_callback: bool, message: str, alert: str):
+    """Reply to a message with the full text, or answer a callback with a short alert"""
+    if is_callback:
+        await update.answer(alert, show_alert=True)
+    else:
+        await update.reply(message, quote=True)
+
 
 async def access_control_middleware(client: Client, update: Union[Message, CallbackQuery], handler_func=None):
     """
@@ -26,14 +60,11 @@ async def access_control_middleware(client: Client, update: Union[Message, Callb
     """
     
     # Extract user info
-    if isinstance(update, Message):
-        user = update.from_user
-        chat = update.chat
-    elif isinstance(update, CallbackQuery):
-        user = update.from_user
-        chat = update.message.chat if update.message else None
-    else:
+    dispatch = _UPDATE_DISPATCH.get(type(update))
+    if dispatch is None:
         return  # Unknown update type
+    extract, deny, is_callback = dispatch
+    user, chat = extract(update)
     
     if not user:
         return  # No user info
@@ -42,52 +73,40 @@ async def access_control_middleware(client: Client, update: Union[Message, Callb
     
     # Only process private chats
     if chat and chat.type != enums.ChatType.PRIVATE:
-        logger.debug(f"Ignoring non-private chat: {chat.type}")
+        logger.debug("Ignoring non-private chat: %s", chat.type)
         return
     
     # Initialize user in database if needed
     try:
         init_user(user_id)
     except Exception as e:
-        logger.error(f"Failed to initialize user {user_id}: {e}")
+        logger.error("Failed to initialize user %s: %s", user_id, e)
     
     # Check user access
     try:
-        access_result = await check_full_user_access(client, user_id)
+        access_result = await get_cached_access(client, user_id)
         
-        if not access_result['has_access']:
+        if not access_result.has_access:
             # User doesn't have access - send denial message
             denial_message = get_access_denied_message(access_result)
+            await deny(client, update, user_id, denial_message)
             
-            if isinstance(update, Message):
-                await update.reply(denial_message, quote=True)
-            elif isinstance(update, CallbackQuery):
-                await update.answer("❌ Access denied", show_alert=True)
-                # Also send a message explaining the denial
-                if update.message:
-                    try:
-                        await update.message.edit_text(denial_message)
-                    except:
-                        await client.send_message(user_id, denial_message)
-            
-            logger.info(f"Access denied for user {user_id}: {access_result['reason']}")
+            logger.info("Access denied for user %s: %s", user_id, access_result.reason)
             return  # Block the handler from executing
         
         # User has access - log and continue
-        logger.debug(f"Access granted for user {user_id}: {access_result['reason']}")
-        
-        # Add access info to update for handler use
-        if hasattr(update, '_access_info'):
-            update._access_info = access_result
-        else:
-            setattr(update, '_access_info', access_result)
+        logger.debug("Access granted for user %s: %s", user_id, access_result.reason)
         
-        # Continue to handler if provided
+        # Continue to handler if provided, with the access info in context
         if handler_func:
-            return await handler_func(client, update)
+            token = access_info_var.set(access_result)
+            try:
+                return await handler_func(client, update)
+            finally:
+                access_info_var.reset(token)
     
     except Exception as e:
-        logger.error(f"Error in access control middleware for user {user_id}: {e}")
+        logger.error("Error in access control middleware for user %s: %s", user_id, e)
         
         # In case of error, deny access to be safe
         error_message = (
@@ -95,11 +114,7 @@ async def access_control_middleware(client: Client, update: Union[Message, Callb
             "An error occurred while checking your access permissions. "
             "Please try again later or contact an administrator."
         )
-        
-        if isinstance(update, Message):
-            await update.reply(error_message, quote=True)
-        elif isinstance(update, CallbackQuery):
-            await update.answer("❌ Access control error", show_alert=True)
+        await _notify(update, is_callback, error_message, "❌ Access control error")
 
 
 def create_access_middleware(handler_func):
@@ -123,32 +138,25 @@ async def admin_only_middleware(client: Client, update: Union[Message, CallbackQ
     Middleware specifically for admin-only functions.
     """
     # Extract user info
-    if isinstance(update, Message):
-        user = update.from_user
-    elif isinstance(update, CallbackQuery):
-        user = update.from_user
-    else:
+    dispatch = _UPDATE_DISPATCH.get(type(update))
+    if dispatch is None:
         return
+    extract, _, is_callback = dispatch
+    user, _ = extract(update)
     
     if not user:
         return
     
     user_id = user.id
-    admin_ids = get_admin_list()
-    
-    if user_id not in admin_ids:
+    if user_id not in get_admin_set():
         error_message = "❌ **Admin Only**\n\nThis feature is restricted to administrators only."
+        await _notify(update, is_callback, error_message, "❌ Admin access required")
         
-        if isinstance(update, Message):
-            await update.reply(error_message, quote=True)
-        elif isinstance(update, CallbackQuery):
-            await update.answer("❌ Admin access required", show_alert=True)
-        
-        logger.warning(f"Non-admin user {user_id} attempted to access admin function")
+        logger.warning("Non-admin user %s attempted to access admin function", user_id)
         return
     
     # User is admin - continue to handler
-    logger.debug(f"Admin access granted for user {user_id}")
+    logger.debug("Admin access granted for user %s", user_id)
     
     if handler_func:
         return await handler_func(client, update)
@@ -170,11 +178,23 @@ def admin_only(handler_func):
     return wrapper
 
 
-async def get_channel_join_buttons():
+def get_channel_join_buttons():
     """
     Generate inline keyboard with buttons to join required channels.
+    The keyboard is rebuilt only after an admin changes the channel list.
     """
-    channels = get_required_channels()
+    version = get_required_channels_version()
+    if _join_keyboard_cache["version"] == version:
+        return _join_keyboard_cache["keyboard"]
+    
+    keyboard = _build_channel_join_buttons(get_required_channels())
+    _join_keyboard_cache["version"] = version
+    _join_keyboard_cache["keyboard"] = keyboard
+    return keyboard
+
+
+def _build_channel_join_buttons(channels: list):
+    """Build the join keyboard for the given channels, or None if there are none"""
     if not channels:
         return None
     
@@ -203,14 +223,14 @@ async def get_channel_join_buttons():
     return types.InlineKeyboardMarkup(buttons)
 
 
-def get_comprehensive_denial_message(access_result: dict) -> tuple:
+def get_comprehensive_denial_message(access_result: AccessResult) -> tuple:
     """
     Get comprehensive denial message with join buttons if applicable.
     
     Returns:
         tuple: (message_text, inline_keyboard_or_none)
     """
-    reason = access_result.get('reason', 'unknown')
+    reason = access_result.reason
     
     if reason == 'banned':
         message = (
@@ -221,8 +241,7 @@ def get_comprehensive_denial_message(access_result: dict) -> tuple:
         return message, None
     
     elif reason == 'no_channel_membership':
-        channel_info = access_result.get('channel_info', {})
-        required_channels = channel_info.get('required_channels', [])
+        required_channels = get_required_channels()
         
         if required_channels:
             message = (
@@ -9,11 +9,21 @@ import threading
 import time
 from typing import Optional
 
+import psutil
+
 logger = logging.getLogger(__name__)
 
+# Seconds between system stats log lines
+STATS_INTERVAL = 300
+
+# Shared handle for this process's own resource usage
+_process = psutil.Process()
+
 # Global variables for stats logging
 _stats_thread: Optional[threading.Thread] = None
 _stats_running = False
+# Set to wake the worker immediately on shutdown
+_stats_stop = threading.Event()
 
 
 def start_stats_logging():
@@ -25,6 +35,7 @@ def start_stats_logging():
         return
     
     _stats_running = True
+    _stats_stop.clear()
     _stats_thread = threading.Thread(target=_stats_worker, daemon=True)
     _stats_thread.start()
     logger.info("Stats logging started")
@@ -39,6 +50,7 @@ def stop_stats_logging():
         return
     
     _stats_running = False
+    _stats_stop.set()
     if _stats_thread and _stats_thread.is_alive():
         _stats_thread.join(timeout=5.0)
     
@@ -49,57 +61,71 @@ def _stats_worker():
     """Background worker for statistics logging"""
     logger.info("Stats logging worker started")
     
-    while _stats_running:
+    # Prime the CPU counter; psutil keeps the baseline per thread, so each later
+    # reading is the average over the whole interval without blocking
+    psutil.cpu_percent(interval=None)
+    
+    # Log basic stats every 5 minutes against absolute deadlines, so the time
+    # spent sampling doesn't push later samples back; wait() returns True as
+    # soon as we're stopped
+    deadline = time.monotonic() + STATS_INTERVAL
+    while not _stats_stop.wait(max(0.0, deadline - time.monotonic())):
+        deadline += STATS_INTERVAL
         try:
-            # Log basic stats every 5 minutes
-            time.sleep(300)  # 5 minutes
-            
-            if _stats_running:
-                _log_system_stats()
-                
+            _log_system_stats()
         except Exception as e:
-            logger.error(f"Error in stats worker: {e}")
-            time.sleep(60)  # Wait 1 minute before retrying
+            logger.error("Error in stats worker: %s", e)
+            deadline += 60  # Wait 1 minute more before retrying
+        # After a long stall, skip the missed slots rather than catching up
+        now = time.monotonic()
+        if deadline <= now:
+            deadline = now + STATS_INTERVAL
 
 
 def _log_system_stats():
     """Log basic system statistics"""
     try:
-        import psutil
-        
         # Get memory usage
         memory = psutil.virtual_memory()
+        # One read of /proc/<pid> serves all per-process values
+        with _process.oneshot():
+            bot_rss = _process.memory_info().rss
+            bot_threads = _process.num_threads()
         
-        # Get CPU usage
-        cpu_percent = psutil.cpu_percent(interval=1)
+        # Get CPU usage since the previous sample
+        cpu_percent = psutil.cpu_percent(interval=None)
         
         # Get disk usage
         disk = psutil.disk_usage('/')
         
         logger.info(
-            f"System Stats - "
-            f"Memory: {memory.percent:.1f}% used ({memory.used // (1024**3):.1f}GB), "
-            f"CPU: {cpu_percent:.1f}%, "
-            f"Disk: {disk.percent:.1f}% used ({disk.used // (1024**3):.1f}GB)"
+            "System Stats - Memory: %.1f%% used (%.1fGB), Bot RSS: %.1fMB, Threads: %d, CPU: %.1f%%, "
+            "Disk: %.1f%% used (%.1fGB)",
+            memory.percent, memory.used // (1024**3), bot_rss / (1024**2), bot_threads, cpu_percent,
+            disk.percent, disk.used // (1024**3)
         )
         
     except Exception as e:
-        logger.error(f"Error logging system stats: {e}")
+        logger.error("Error logging system stats: %s", e)
 
 
 def log_download_stats(user_id: int, url: str, success: bool, file_size: int = None, duration: float = None):
     """Log download statistics"""
+    if not logger.isEnabledFor(logging.INFO):
+        return
     status = "SUCCESS" if success else "FAILED"
     size_str = f", Size: {file_size // (1024**2):.1f}MB" if file_size else ""
     duration_str = f", Duration: {duration:.1f}s" if duration else ""
     
-    logger.info(f"Download {status} - User: {user_id}, URL: {url[:50]}...{size_str}{duration_str}")
+    logger.info("Download %s - User: %s, URL: %s...%s%s", status, user_id, url[:50], size_str, duration_str)
 
 
 def log_user_activity(user_id: int, activity: str, details: dict = None):
     """Log user activity"""
+    if not logger.isEnabledFor(logging.INFO):
+        return
     details_str = f", Details: {details}" if details else ""
-    logger.info(f"User Activity - User: {user_id}, Activity: {activity}{details_str}")
+    logger.info("User Activity - User: %s, Activity: %s%s", user_id, activity, details_str)
 
 
 def get_stats_status() -> dict:
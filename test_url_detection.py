@@ -7,11 +7,11 @@ sys.path.append('src')
 def test_direct_download_detection():
     """Test the URL auto-detection logic for direct downloads"""
     
-    # Define the same extensions as in main.py
-    direct_download_extensions = {'.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', '.xz', 
-                                '.pdf', '.doc', '.docx', '.xlsx', '.ppt', '.pptx',
-                                '.exe', '.msi', '.deb', '.rpm', '.dmg', '.pkg',
-                                '.iso', '.img', '.bin'}
+    # Define the same extensions as in main.py, matched against the text after the last dot
+    direct_download_extensions = frozenset({'zip', 'rar', '7z', 'tar', 'gz', 'bz2', 'xz',
+                                            'pdf', 'doc', 'docx', 'xlsx', 'ppt', 'pptx',
+                                            'exe', 'msi', 'deb', 'rpm', 'dmg', 'pkg',
+                                            'iso', 'img', 'bin'})
     
     test_urls = [
         ("https://github.com/aandrew-me/ytDownloader/releases/download/v3.19.1/YTDownloader_Mac_arm64.zip", True),
@@ -27,8 +27,8 @@ def test_direct_download_detection():
     print("Testing direct download auto-detection...")
     
     for url, expected in test_urls:
-        url_lower = url.lower()
-        is_direct_download = any(url_lower.endswith(ext) for ext in direct_download_extensions)
+        dot = url.rfind('.')
+        is_direct_download = dot != -1 and url[dot + 1:].lower() in direct_download_extensions
         
         status = "✓" if is_direct_download == expected else "✗"
         print(f"{status} {url} -> direct download: {is_direct_download} (expected: {expected})")